@@ -0,0 +1,227 @@
+import argparse
+import gc
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+import vpxcleaner
+from make_test_vpx import generate_vpx_of_size, parse_size
+
+DEFAULT_SCALES = "100MB,500MB,2GB"
+MIN_REGRESSION_SECONDS = 0.05  # timings below this are too noisy to compare
+MIN_REGRESSION_BYTES = 1024 * 1024  # same for peak memory
+
+
+def measure(func, track_memory=True):
+    """Run func twice: once for wall time, once under tracemalloc for peak memory.
+
+    Returns:
+        Tuple of (seconds, peak bytes or None)
+    """
+    gc.collect()
+    start = time.perf_counter()
+    func()
+    wall = time.perf_counter() - start
+
+    if not track_memory:
+        return wall, None
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return wall, peak
+
+
+def bench_extract_name(vpx_path, track_memory=True, backend='olefile'):
+    """Time extract_name_from_binary alone over every image and sound stream.
+
+    Streams are read one at a time outside of the timed section, so a 2 GB
+    table never has to fit in memory at once.
+    """
+    ole = vpxcleaner.open_vpx(vpx_path, backend)
+    wall = 0.0
+    peak = 0 if track_memory else None
+    try:
+        for stream in ole.listdir():
+            stream_path = '/'.join(stream)
+            if not stream_path.startswith(("GameStg/Image", "GameStg/Sound")):
+                continue
+            is_image = stream_path.startswith("GameStg/Image")
+            data = vpxcleaner.read_stream(ole, stream)
+
+            start = time.perf_counter()
+            name = vpxcleaner.extract_name_from_binary(data, is_image=is_image)
+            wall += time.perf_counter() - start
+
+            if track_memory:
+                tracemalloc.start()
+                try:
+                    vpxcleaner.extract_name_from_binary(data, is_image=is_image)
+                    _, call_peak = tracemalloc.get_traced_memory()
+                finally:
+                    tracemalloc.stop()
+                peak = max(peak, call_peak)
+            del data, name
+    finally:
+        ole.close()
+    return wall, peak
+
+
+def run_benchmarks(vpx_path, work_dir, track_memory=True, backend='olefile'):
+    """Benchmark the scan pipeline on one table.
+
+    Returns:
+        Dict of {benchmark name: {'seconds': ..., 'peak_bytes': ...}}
+    """
+    results = {}
+
+    def record(name, wall_peak):
+        wall, peak = wall_peak
+        results[name] = {'seconds': wall, 'peak_bytes': peak}
+        peak_text = vpxcleaner.format_size(peak) if peak is not None else 'n/a'
+        print(f"  {name:28s} {wall:10.3f} s   peak {peak_text:>12s}")
+
+    record('list_vpx_assets', measure(lambda: vpxcleaner.list_vpx_assets(vpx_path, backend), track_memory))
+    record('extract_name_from_binary', bench_extract_name(vpx_path, track_memory, backend))
+
+    images, sounds, all_data = vpxcleaner.list_vpx_assets(vpx_path, backend)
+    record('find_unused_assets',
+           measure(lambda: vpxcleaner.find_unused_assets(images, sounds, all_data), track_memory))
+    unused_images, unused_sounds = vpxcleaner.find_unused_assets(images, sounds, all_data)
+    del all_data
+
+    record('analyze_vpx', measure(lambda: vpxcleaner.analyze_vpx(vpx_path, backend=backend), track_memory))
+    summary = vpxcleaner.analyze_vpx(vpx_path, backend=backend)
+
+    def write_reports():
+        report_path = vpxcleaner.remove_unused_assets(vpx_path, unused_images, unused_sounds)
+        os.remove(report_path)
+        library_report = os.path.join(work_dir, 'library_report.txt')
+        vpxcleaner.write_library_report([summary], library_report)
+        os.remove(library_report)
+    record('report', measure(write_reports, track_memory))
+
+    return results
+
+
+def config_mismatches(config, baseline_config):
+    """Return the settings that differ between this run and a baseline run."""
+    if not baseline_config:
+        return ['baseline has no recorded settings']
+    return [f"{key}: {baseline_config.get(key)!r} -> {value!r}"
+            for key, value in config.items() if baseline_config.get(key) != value]
+
+
+def compare_with_baseline(results, baseline, tolerance):
+    """Return a list of regressions versus a saved baseline run."""
+    regressions = []
+    for scale, benchmarks in results.items():
+        for name, current in benchmarks.items():
+            previous = baseline.get(scale, {}).get(name)
+            if not previous:
+                continue
+            for key, label in (('seconds', 'time'), ('peak_bytes', 'memory')):
+                before, after = previous.get(key), current.get(key)
+                if key == 'seconds' and after is not None and after < MIN_REGRESSION_SECONDS:
+                    continue
+                if key == 'peak_bytes' and after is not None and after < MIN_REGRESSION_BYTES:
+                    continue
+                if before and after and after > before * (1 + tolerance):
+                    regressions.append(f"{scale} {name}: {label} {before:.6g} -> {after:.6g} "
+                                       f"(+{(after / before - 1) * 100:.0f}%)")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description='Benchmark vpxcleaner on synthetic VPX tables',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Default 100 MB, 500 MB and 2 GB tables, save the results
+  python benchmark_vpx.py --json bench.json
+
+  # Quick run, fail if anything got more than 25% slower or bigger
+  python benchmark_vpx.py --scales 100MB --baseline bench.json --tolerance 0.25
+        """
+    )
+    parser.add_argument('--scales', default=DEFAULT_SCALES,
+                        help=f'Comma separated table sizes to benchmark (default: {DEFAULT_SCALES})')
+    parser.add_argument('--work-dir', default=os.path.join(tempfile.gettempdir(), 'vpx_bench'),
+                        help='Where generated tables are kept between runs (default: system temp dir)')
+    parser.add_argument('--images', type=int, default=100, help='Images per table (default: 100)')
+    parser.add_argument('--sounds', type=int, default=150, help='Sounds per table (default: 150)')
+    parser.add_argument('--game-items', type=int, default=300, help='Game items per table (default: 300)')
+    parser.add_argument('--density', type=float, default=0.3,
+                        help='Fraction of assets referenced by the table (default: 0.3)')
+    parser.add_argument('--backend', choices=vpxcleaner.READER_BACKENDS, default='olefile',
+                        help='Compound file reader to benchmark (default: olefile)')
+    parser.add_argument('--no-memory', action='store_true',
+                        help='Skip the tracemalloc pass (wall time only, about half the run time)')
+    parser.add_argument('--json', metavar='PATH', help='Save results as JSON')
+    parser.add_argument('--baseline', metavar='PATH', help='Compare with a saved JSON run and fail on regressions')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='Allowed slowdown/growth versus the baseline (default: 0.2 = 20%%)')
+
+    args = parser.parse_args()
+    os.makedirs(args.work_dir, exist_ok=True)
+
+    # Everything that changes the numbers; runs are only compared if these match
+    config = {
+        'backend': args.backend,
+        'images': args.images,
+        'sounds': args.sounds,
+        'game_items': args.game_items,
+        'density': args.density,
+        'memory': not args.no_memory,
+    }
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        mismatches = config_mismatches(config, baseline.get('config'))
+        if mismatches:
+            print(f"❌ {args.baseline} was recorded with different settings, not comparing:")
+            for line in mismatches:
+                print(f"  - {line}")
+            exit(1)
+
+    print("="*70)
+    print("VPX CLEANER - Benchmark")
+    print("="*70)
+
+    results = {}
+    for scale in [s.strip() for s in args.scales.split(',') if s.strip()]:
+        size = parse_size(scale)
+        vpx_path = os.path.join(args.work_dir,
+                                f"synthetic_{scale}_{args.images}i_{args.sounds}s_{args.game_items}g_"
+                                f"{args.density}.vpx")
+        if not os.path.exists(vpx_path):
+            print(f"\n📁 Generating {scale} table...")
+            generate_vpx_of_size(vpx_path, size, images=args.images, sounds=args.sounds,
+                                 game_items=args.game_items, reference_density=args.density)
+        print(f"\n📊 {scale} ({vpxcleaner.format_size(os.path.getsize(vpx_path))}): {vpx_path}")
+        results[scale] = run_benchmarks(vpx_path, args.work_dir, track_memory=not args.no_memory,
+                                        backend=args.backend)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'config': config, 'results': results}, f, indent=1)
+        print(f"\n📄 Results saved to: {args.json}")
+
+    if baseline is not None:
+        regressions = compare_with_baseline(results, baseline['results'], args.tolerance)
+        print("\n" + "="*70)
+        if regressions:
+            print(f"❌ {len(regressions)} regressions versus {args.baseline}:")
+            for line in regressions:
+                print(f"  - {line}")
+            print("="*70)
+            exit(1)
+        print(f"✅ No regressions versus {args.baseline}")
+        print("="*70)
@@ -0,0 +1,414 @@
+import argparse
+import math
+import os
+import random
+import struct
+
+# Compound File Binary (OLE) constants, version 3 layout (512 byte sectors)
+SECTOR_SIZE = 512
+MINI_SECTOR_SIZE = 64
+MINI_STREAM_CUTOFF = 4096
+FREESECT = 0xFFFFFFFF
+ENDOFCHAIN = 0xFFFFFFFE
+FATSECT = 0xFFFFFFFD
+DIFSECT = 0xFFFFFFFC
+NOSTREAM = 0xFFFFFFFF
+CFB_SIGNATURE = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+
+# Game item type ids as written by Visual Pinball (ItemTypeEnum)
+ITEM_TYPES = [0, 1, 2, 3, 5, 6, 7, 8, 12, 19]  # surface, flipper, timer, plunger, bumper, trigger, light, kicker, ramp, primitive
+
+
+class CompoundFileWriter:
+    """Minimal streaming writer for OLE compound files.
+
+    Large streams are written straight to disk as they are added, so tables of
+    several GB can be generated without holding them in memory. Small streams
+    (under 4 KB) go to the mini stream, like Visual Pinball/Windows do.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.f = open(path, 'wb')
+        self.f.write(b'\0' * SECTOR_SIZE)  # header, filled in by close()
+        self.fat = []
+        self.mini_fat = []
+        self.mini_stream = bytearray()
+        self.streams = {}  # {path tuple: (start sector, size)}
+
+    def _write_sectors(self, chunks):
+        """Write chunks as a contiguous sector chain, return (start, size)."""
+        start = len(self.fat)
+        size = 0
+        for chunk in chunks:
+            self.f.write(chunk)
+            size += len(chunk)
+        if size % SECTOR_SIZE:
+            self.f.write(b'\0' * (SECTOR_SIZE - size % SECTOR_SIZE))
+        count = (size + SECTOR_SIZE - 1) // SECTOR_SIZE
+        self.fat.extend(range(start + 1, start + count))
+        if count:
+            self.fat.append(ENDOFCHAIN)
+        return (start, size) if count else (ENDOFCHAIN, 0)
+
+    def add_stream(self, path, chunks, size):
+        """Add a stream.
+
+        Args:
+            path: Stream path, e.g. ['GameStg', 'Image0']
+            chunks: bytes, or an iterable of bytes chunks
+            size: Total stream size in bytes (must match the chunks)
+        """
+        if isinstance(chunks, (bytes, bytearray)):
+            chunks = [chunks]
+        if size < MINI_STREAM_CUTOFF:
+            data = b''.join(chunks)
+            if not data:
+                self.streams[tuple(path)] = (ENDOFCHAIN, 0)
+                return
+            start = len(self.mini_fat)
+            count = (len(data) + MINI_SECTOR_SIZE - 1) // MINI_SECTOR_SIZE
+            self.mini_fat.extend(range(start + 1, start + count))
+            self.mini_fat.append(ENDOFCHAIN)
+            self.mini_stream += data + b'\0' * (count * MINI_SECTOR_SIZE - len(data))
+            self.streams[tuple(path)] = (start, len(data))
+        else:
+            start, written = self._write_sectors(chunks)
+            if written != size:
+                raise ValueError(f"{'/'.join(path)}: expected {size} bytes, got {written}")
+            self.streams[tuple(path)] = (start, written)
+
+    def _build_directory(self):
+        """Return directory entries as dicts, root entry first."""
+        entries = [{'name': 'Root Entry', 'type': 5, 'children': {}}]
+        storages = {(): entries[0]}
+        for path in sorted(self.streams):
+            for depth in range(1, len(path)):
+                key = path[:depth]
+                if key not in storages:
+                    entry = {'name': key[-1], 'type': 1, 'children': {}}
+                    storages[key[:-1]]['children'][key[-1]] = entry
+                    storages[key] = entry
+                    entries.append(entry)
+            start, size = self.streams[path]
+            entry = {'name': path[-1], 'type': 2, 'start': start, 'size': size}
+            storages[path[:-1]]['children'][path[-1]] = entry
+            entries.append(entry)
+        for i, entry in enumerate(entries):
+            entry['id'] = i
+            entry.setdefault('left', NOSTREAM)
+            entry.setdefault('right', NOSTREAM)
+        for entry in entries:
+            if entry['type'] in (1, 5):
+                # Siblings form a binary search tree ordered by (length, uppercase name)
+                children = sorted(entry['children'].values(),
+                                  key=lambda e: (len(e['name']), e['name'].upper()))
+                entry['child'] = self._link_tree(children)
+        return entries
+
+    def _link_tree(self, nodes):
+        if not nodes:
+            return NOSTREAM
+        mid = len(nodes) // 2
+        node = nodes[mid]
+        node['left'] = self._link_tree(nodes[:mid])
+        node['right'] = self._link_tree(nodes[mid + 1:])
+        return node['id']
+
+    @staticmethod
+    def _pack_entry(entry):
+        if entry is None:
+            return (b'\0' * 64 + struct.pack('<HBB3I', 0, 0, 0, NOSTREAM, NOSTREAM, NOSTREAM)
+                    + b'\0' * 36 + struct.pack('<IQ', 0, 0))
+        name = entry['name'].encode('utf-16-le')
+        return (name + b'\0' * (64 - len(name))
+                + struct.pack('<HBB3I', len(name) + 2, entry['type'], 1,
+                              entry['left'], entry['right'], entry.get('child', NOSTREAM))
+                + b'\0' * 36
+                + struct.pack('<IQ', entry.get('start', ENDOFCHAIN), entry.get('size', 0)))
+
+    def close(self):
+        # Mini stream container is a regular stream owned by the root entry
+        if self.mini_stream:
+            mini_start, mini_size = self._write_sectors([bytes(self.mini_stream)])
+        else:
+            mini_start, mini_size = ENDOFCHAIN, 0
+        if self.mini_fat:
+            table = self.mini_fat + [FREESECT] * (-len(self.mini_fat) % (SECTOR_SIZE // 4))
+            mini_fat_start, size = self._write_sectors([struct.pack(f'<{len(table)}I', *table)])
+            mini_fat_count = size // SECTOR_SIZE
+        else:
+            mini_fat_start, mini_fat_count = ENDOFCHAIN, 0
+
+        entries = self._build_directory()
+        entries[0]['start'], entries[0]['size'] = mini_start, mini_size
+        entries += [None] * (-len(entries) % (SECTOR_SIZE // 128))
+        dir_start, _ = self._write_sectors(self._pack_entry(e) for e in entries)
+
+        # Size the FAT so it also covers its own sectors and the DIFAT sectors
+        per_sector = SECTOR_SIZE // 4
+        data_sectors = len(self.fat)
+        fat_count, difat_count = 1, 0
+        while True:
+            needed_difat = max(0, math.ceil((fat_count - 109) / (per_sector - 1)))
+            needed_fat = math.ceil((data_sectors + fat_count + needed_difat) / per_sector)
+            if needed_fat == fat_count and needed_difat == difat_count:
+                break
+            fat_count, difat_count = max(fat_count, needed_fat), needed_difat
+
+        fat_start = len(self.fat)
+        fat_sectors = list(range(fat_start, fat_start + fat_count))
+        difat_sectors = list(range(fat_start + fat_count, fat_start + fat_count + difat_count))
+        fat = self.fat + [FATSECT] * fat_count + [DIFSECT] * difat_count
+        fat += [FREESECT] * (fat_count * per_sector - len(fat))
+        self.f.write(struct.pack(f'<{len(fat)}I', *fat))
+
+        remaining = fat_sectors[109:]
+        for i, sector in enumerate(difat_sectors):
+            ids = remaining[i * (per_sector - 1):(i + 1) * (per_sector - 1)]
+            ids += [FREESECT] * (per_sector - 1 - len(ids))
+            next_sector = difat_sectors[i + 1] if i + 1 < len(difat_sectors) else ENDOFCHAIN
+            self.f.write(struct.pack(f'<{per_sector}I', *ids, next_sector))
+
+        header_difat = fat_sectors[:109] + [FREESECT] * (109 - len(fat_sectors[:109]))
+        header = (CFB_SIGNATURE + b'\0' * 16
+                  + struct.pack('<HHHHH', 0x3E, 3, 0xFFFE, 9, 6) + b'\0' * 6
+                  + struct.pack('<IIIIIIIII', 0, fat_count, dir_start, 0, MINI_STREAM_CUTOFF,
+                                mini_fat_start, mini_fat_count,
+                                difat_sectors[0] if difat_sectors else ENDOFCHAIN, difat_count)
+                  + struct.pack('<109I', *header_difat))
+        self.f.seek(0)
+        self.f.write(header)
+        self.f.close()
+
+
+def _biff(tag, data=b''):
+    return struct.pack('<I', len(data) + 4) + tag + data
+
+
+def _biff_string(tag, value):
+    raw = value.encode('ascii')
+    return _biff(tag, struct.pack('<I', len(raw)) + raw)
+
+
+def _biff_wide_string(tag, value):
+    raw = value.encode('utf-16-le')
+    return _biff(tag, struct.pack('<I', len(raw)) + raw)
+
+
+def _biff_int(tag, value):
+    return _biff(tag, struct.pack('<i', value))
+
+
+def _pattern_chunks(seed, size, chunk_size=1024 * 1024):
+    """Yield `size` bytes of deterministic, mildly compressible filler."""
+    rng = random.Random(seed)
+    block = bytes(rng.randrange(256) for _ in range(251)) + bytes(5)
+    block = block * (chunk_size // len(block) + 1)
+    while size > 0:
+        n = min(size, chunk_size)
+        yield block[:n]
+        size -= n
+
+
+def bmp_size(width, height):
+    return 54 + ((width * 3 + 3) & ~3) * height
+
+
+def image_stream(name, width, height, seed):
+    """Return (size, chunks) for a GameStg/Image* stream holding a 24-bit BMP."""
+    payload_size = bmp_size(width, height)
+    bmp_header = (b'BM' + struct.pack('<IHHI', payload_size, 0, 0, 54)
+                  + struct.pack('<IiiHHIIiiII', 40, width, height, 1, 24, 0,
+                                payload_size - 54, 2835, 2835, 0, 0))
+    head = (_biff_string(b'NAME', name)
+            + _biff_string(b'PATH', f'C:\\Assets\\{name}.bmp')
+            + _biff_int(b'WDTH', width)
+            + _biff_int(b'HGHT', height)
+            + _biff(b'JPEG')
+            + _biff_string(b'NAME', name)
+            + _biff_string(b'PATH', f'C:\\Assets\\{name}.bmp')
+            + _biff_int(b'SIZE', payload_size)
+            + struct.pack('<I', payload_size + 4) + b'DATA'
+            + bmp_header)
+    tail = _biff(b'ENDB') + _biff(b'ALTV', struct.pack('<f', 1.0)) + _biff(b'ENDB')
+    size = len(head) + payload_size - 54 + len(tail)
+
+    def chunks():
+        yield head
+        yield from _pattern_chunks(seed, payload_size - 54)
+        yield tail
+    return size, chunks()
+
+
+def sound_stream(name, data_size, seed, rate=44100, channels=2, bits=16):
+    """Return (size, chunks) for a GameStg/Sound* stream holding PCM WAV data."""
+    block_align = channels * bits // 8
+    data_size -= data_size % block_align
+    raw_name = name.encode('ascii')
+    path = f'C:\\Sounds\\{name}.wav'.encode('ascii')
+    head = (struct.pack('<I', len(raw_name)) + raw_name
+            + struct.pack('<I', len(path)) + path
+            + struct.pack('<I', len(raw_name)) + raw_name.lower()
+            + struct.pack('<HHIIHHH', 1, channels, rate, rate * block_align, block_align, bits, 0)
+            + struct.pack('<I', data_size))
+    tail = struct.pack('<biiii', 0, 0, 0, 0, 0)
+    size = len(head) + data_size + len(tail)
+
+    def chunks():
+        yield head
+        yield from _pattern_chunks(seed, data_size)
+        yield tail
+    return size, chunks()
+
+
+def game_item_stream(index, image_refs):
+    data = struct.pack('<I', ITEM_TYPES[index % len(ITEM_TYPES)])
+    data += _biff_wide_string(b'NAME', f'Item{index:04d}')
+    for ref in image_refs:
+        data += _biff_string(b'IMAG', ref)
+    data += _biff(b'ENDB')
+    return data
+
+
+def game_data_stream(script, counts):
+    data = b''
+    for tag, value in zip((b'SEDT', b'SSND', b'SIMG', b'SFNT', b'SCOL'), counts):
+        data += _biff_int(tag, value)
+    raw = script.encode('ascii')
+    data += _biff(b'CODE', struct.pack('<I', len(raw)) + raw)
+    data += _biff(b'ENDB')
+    return data
+
+
+def generate_vpx(path, images=100, sounds=150, game_items=300, image_size=512 * 1024,
+                 sound_size=128 * 1024, reference_density=0.3, duplicate_ratio=0.0, seed=0):
+    """Write a synthetic VPX table.
+
+    Args:
+        path: Output .vpx path
+        images: Number of GameStg/Image* streams
+        sounds: Number of GameStg/Sound* streams
+        game_items: Number of GameStg/GameItem* streams
+        image_size: Approximate bytes per image payload
+        sound_size: Approximate bytes per sound payload
+        reference_density: Fraction of images/sounds referenced by the table
+        duplicate_ratio: Fraction of assets reusing an earlier asset's payload
+        seed: Seed for names, references and payload contents
+
+    Returns:
+        Dict with the generated image/sound names and which ones are referenced
+    """
+    rng = random.Random(seed)
+    side = max(1, int(math.sqrt(max(image_size - 54, 3) / 3)))
+    image_names = [f'img_{i:04d}_{rng.choice(["bg", "flipper", "ramp", "apron", "plastic"])}'
+                   for i in range(images)]
+    sound_names = [f'snd_{i:04d}_{rng.choice(["hit", "music", "callout", "mech"])}'
+                   for i in range(sounds)]
+    used_images = set(rng.sample(image_names, round(images * reference_density)))
+    used_sounds = set(rng.sample(sound_names, round(sounds * reference_density)))
+
+    def payload_seed(kind, i):
+        # Duplicates reuse the payload of a random earlier asset
+        if i and rng.random() < duplicate_ratio:
+            i = rng.randrange(i)
+        return f'{seed}-{kind}-{i}'
+
+    writer = CompoundFileWriter(path)
+    try:
+        for i, name in enumerate(image_names):
+            size, chunks = image_stream(name, side, side, payload_seed('image', i))
+            writer.add_stream(['GameStg', f'Image{i}'], chunks, size)
+        for i, name in enumerate(sound_names):
+            size, chunks = sound_stream(name, sound_size, payload_seed('sound', i))
+            writer.add_stream(['GameStg', f'Sound{i}'], chunks, size)
+
+        refs = sorted(used_images)
+        per_item = math.ceil(len(refs) / game_items) if game_items else 0
+        for i in range(game_items):
+            data = game_item_stream(i, refs[i * per_item:(i + 1) * per_item])
+            writer.add_stream(['GameStg', f'GameItem{i}'], data, len(data))
+
+        script = ['Option Explicit', 'Randomize', '']
+        if not game_items:
+            script += [f'Table1.Image = "{name}"' for name in refs]
+        script += [f'Sub Event{i}_Hit : PlaySound "{name}" : End Sub'
+                   for i, name in enumerate(sorted(used_sounds))]
+        data = game_data_stream('\r\n'.join(script), [game_items, sounds, images, 0, 0])
+        writer.add_stream(['GameStg', 'GameData'], data, len(data))
+
+        version = struct.pack('<i', 1080)
+        writer.add_stream(['GameStg', 'Version'], version, len(version))
+        info = 'Synthetic Table'.encode('utf-16-le')
+        writer.add_stream(['TableInfo', 'TableName'], info, len(info))
+    finally:
+        writer.close()
+
+    return {
+        'images': image_names,
+        'sounds': sound_names,
+        'used_images': used_images,
+        'used_sounds': used_sounds,
+    }
+
+
+def generate_vpx_of_size(path, total_size, image_share=0.8, **kwargs):
+    """Write a synthetic table of roughly total_size bytes.
+
+    The asset counts (and the other generate_vpx options) are kept, and the
+    per-asset sizes are scaled to reach the requested total.
+    """
+    images = kwargs.setdefault('images', 100)
+    sounds = kwargs.setdefault('sounds', 150)
+    kwargs['image_size'] = int(total_size * image_share / max(images, 1))
+    kwargs['sound_size'] = int(total_size * (1 - image_share) / max(sounds, 1))
+    return generate_vpx(path, **kwargs)
+
+
+def parse_size(text):
+    """Parse sizes like '500MB' or '2G' into bytes."""
+    text = text.strip().upper().rstrip('B')
+    units = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+    if text and text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description='Generate synthetic VPX tables for testing and benchmarking vpxcleaner',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Small table with default settings
+  python make_test_vpx.py synthetic.vpx
+
+  # ~500 MB table where half of the assets are referenced
+  python make_test_vpx.py big.vpx --size 500MB --density 0.5
+        """
+    )
+    parser.add_argument('output', help='Path of the VPX file to create')
+    parser.add_argument('--images', type=int, default=100, help='Number of images (default: 100)')
+    parser.add_argument('--sounds', type=int, default=150, help='Number of sounds (default: 150)')
+    parser.add_argument('--game-items', type=int, default=300, help='Number of game items (default: 300)')
+    parser.add_argument('--image-size', default='512KB', help='Bytes per image (default: 512KB)')
+    parser.add_argument('--sound-size', default='128KB', help='Bytes per sound (default: 128KB)')
+    parser.add_argument('--size', help='Target total table size, e.g. 500MB (overrides --image-size/--sound-size)')
+    parser.add_argument('--density', type=float, default=0.3,
+                        help='Fraction of assets referenced by the table (default: 0.3)')
+    parser.add_argument('--duplicates', type=float, default=0.0,
+                        help='Fraction of assets sharing an earlier asset\'s payload (default: 0)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+
+    args = parser.parse_args()
+    options = dict(images=args.images, sounds=args.sounds, game_items=args.game_items,
+                   reference_density=args.density, duplicate_ratio=args.duplicates, seed=args.seed)
+    if args.size:
+        info = generate_vpx_of_size(args.output, parse_size(args.size), **options)
+    else:
+        info = generate_vpx(args.output, image_size=parse_size(args.image_size),
+                            sound_size=parse_size(args.sound_size), **options)
+
+    print(f"✅ Created {args.output} ({os.path.getsize(args.output) / 1024 / 1024:.2f} MB)")
+    print(f"   Images: {len(info['images'])} ({len(info['used_images'])} referenced)")
+    print(f"   Sounds: {len(info['sounds'])} ({len(info['used_sounds'])} referenced)")
@@ -0,0 +1,96 @@
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+
+import vpxcleaner
+from make_test_vpx import generate_vpx
+
+TABLE = dict(images=12, sounds=12, game_items=20, image_size=8000, sound_size=6000)
+
+
+def rename_assets(path, renames):
+    """Rename assets inside their streams (same length names), leaving references alone."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    for old, new in renames.items():
+        assert len(old) == len(new)
+        if old.startswith('img_'):
+            # NAME records of the image and of its embedded file, then the PATH records
+            data = data.replace(struct.pack('<I4sI', len(old) + 8, b'NAME', len(old)) + old.encode(),
+                                struct.pack('<I4sI', len(new) + 8, b'NAME', len(new)) + new.encode())
+            data = data.replace(f'\\{old}.bmp'.encode(), f'\\{new}.bmp'.encode())
+        else:
+            # Name and internal name strings at the start of the sound stream, then the path
+            data = data.replace(struct.pack('<I', len(old)) + old.encode(),
+                                struct.pack('<I', len(new)) + new.encode())
+            data = data.replace(f'\\{old}.wav'.encode(), f'\\{new}.wav'.encode())
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+class ScanCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.work_dir, 'table.vpx')
+        self.cache_dir = os.path.join(self.work_dir, 'cache')
+        self.table = generate_vpx(self.path, **TABLE)
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir)
+
+    def touch(self):
+        # Make sure the change is visible even on filesystems with coarse mtimes
+        mtime = os.stat(self.path).st_mtime + 10
+        os.utime(self.path, (mtime, mtime))
+
+    def assertMatchesUncached(self, expected_cache):
+        cached = vpxcleaner.analyze_vpx(self.path, self.cache_dir)
+        uncached = vpxcleaner.analyze_vpx(self.path)
+        self.assertEqual(cached['cache'], expected_cache)
+        for key in ('cache', 'reanalyzed', 'stats'):
+            del cached[key], uncached[key]
+        self.assertEqual(cached, uncached)
+        return cached
+
+    def test_unchanged_table_is_a_cache_hit(self):
+        self.assertMatchesUncached('miss')
+        self.assertMatchesUncached('hit')
+
+    def test_changed_references(self):
+        self.assertMatchesUncached('miss')
+        self.table = generate_vpx(self.path, reference_density=0.7, **TABLE)
+        self.touch()
+        self.assertMatchesUncached('partial')
+
+    def test_renamed_assets(self):
+        self.assertMatchesUncached('miss')
+        image = sorted(self.table['used_images'])[0]
+        sound = sorted(self.table['used_sounds'])[0]
+        renames = {image: 'alt_' + image[4:], sound: 'alt_' + sound[4:]}
+
+        # References still use the old names, so the renamed assets become unused
+        rename_assets(self.path, renames)
+        self.touch()
+        summary = self.assertMatchesUncached('partial')
+        self.assertIn(renames[image], summary['unused_images'])
+        self.assertIn(renames[sound], summary['unused_sounds'])
+
+        # Renaming back must find the references in the unchanged game streams again
+        rename_assets(self.path, {new: old for old, new in renames.items()})
+        self.touch()
+        summary = self.assertMatchesUncached('partial')
+        self.assertNotIn(image, summary['unused_images'])
+        self.assertNotIn(sound, summary['unused_sounds'])
+
+    def test_regenerated_table(self):
+        self.assertMatchesUncached('miss')
+        generate_vpx(self.path, seed=1, **TABLE)
+        self.touch()
+        self.assertMatchesUncached('partial')
+
+
+if __name__ == '__main__':
+    unittest.main()
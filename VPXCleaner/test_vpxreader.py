@@ -0,0 +1,97 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import olefile
+
+import vpxreader
+from make_test_vpx import SECTOR_SIZE, CompoundFileWriter, game_data_stream, image_stream, sound_stream
+
+
+def build_table(path):
+    """Write a compound file with mini streams, a fragmented stream and a DIFAT."""
+    writer = CompoundFileWriter(path)
+    try:
+        size, chunks = image_stream('bg_left', 64, 64, 'image')
+        writer.add_stream(['GameStg', 'Image0'], chunks, size)
+        size, chunks = sound_stream('hit', 20000, 'sound')
+        writer.add_stream(['GameStg', 'Sound0'], chunks, size)
+        data = game_data_stream('PlaySound "hit"', [0, 1, 1, 0, 0])
+        writer.add_stream(['GameStg', 'GameData'], data, len(data))  # mini stream
+
+        # Sectors written in the order A C B D..., relinked as A -> B -> C -> D...
+        sectors = [bytes([i + 1]) * SECTOR_SIZE for i in range(8)]
+        start = len(writer.fat)
+        writer.add_stream(['GameStg', 'Fragmented'], [sectors[0], sectors[2], sectors[1]] + sectors[3:],
+                          len(sectors) * SECTOR_SIZE)
+        writer.fat[start], writer.fat[start + 2], writer.fat[start + 1] = start + 2, start + 1, start + 3
+
+        # 8 MB needs over 109 FAT sectors, so the rest are listed in DIFAT sectors
+        writer.add_stream(['GameStg', 'Big'], (bytes([i]) * (1024 * 1024) for i in range(8)), 8 * 1024 * 1024)
+
+        writer.add_stream(['TableInfo', 'TableName'], 'Test'.encode('utf-16-le'), 8)
+    finally:
+        writer.close()
+    return b''.join(sectors)
+
+
+class CompoundFileTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.work_dir = tempfile.mkdtemp()
+        cls.path = os.path.join(cls.work_dir, 'table.vpx')
+        cls.fragmented = build_table(cls.path)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.work_dir)
+
+    def setUp(self):
+        self.ole = olefile.OleFileIO(self.path)
+        self.cf = vpxreader.CompoundFile(self.path)
+
+    def tearDown(self):
+        self.ole.close()
+        self.cf.close()
+
+    def test_listdir_matches_olefile(self):
+        self.assertEqual(self.cf.listdir(), self.ole.listdir())
+
+    def test_streams_match_olefile(self):
+        for stream in self.ole.listdir():
+            with self.subTest(stream='/'.join(stream)):
+                self.assertEqual(self.cf.get_size(stream), self.ole.get_size(stream))
+                self.assertEqual(bytes(self.cf.stream_view(stream)), self.ole.openstream(stream).read())
+
+    def test_fragmented_stream(self):
+        view = self.cf.stream_view(['GameStg', 'Fragmented'])
+        self.assertIsInstance(view, vpxreader.ChainedView)
+        self.assertEqual(bytes(view), self.fragmented)
+        self.assertEqual(bytes(view[SECTOR_SIZE - 10:2 * SECTOR_SIZE + 10]),
+                         self.fragmented[SECTOR_SIZE - 10:2 * SECTOR_SIZE + 10])
+        self.assertEqual(self.ole.openstream(['GameStg', 'Fragmented']).read(), self.fragmented)
+
+    def test_stream_view_limit(self):
+        for stream in self.ole.listdir():
+            with self.subTest(stream='/'.join(stream)):
+                head = bytes(self.cf.stream_view(stream, limit=SECTOR_SIZE + 100))
+                self.assertEqual(head, self.ole.openstream(stream).read(SECTOR_SIZE + 100))
+
+    def test_openstream_reads(self):
+        expected = self.ole.openstream(['GameStg', 'Fragmented']).read()
+        with self.cf.openstream(['GameStg', 'Fragmented']) as f:
+            self.assertEqual(f.read(100), expected[:100])
+            f.seek(SECTOR_SIZE * 2 - 50)
+            self.assertEqual(b''.join(f.read_views(100)), expected[SECTOR_SIZE * 2 - 50:SECTOR_SIZE * 2 + 50])
+            self.assertEqual(f.tell(), SECTOR_SIZE * 2 + 50)
+
+    def test_missing_stream(self):
+        self.assertFalse(self.cf.exists(['GameStg', 'Image9']))
+        with self.assertRaises(OSError):
+            self.cf.stream_view(['GameStg', 'Image9'])
+
+
+if __name__ == '__main__':
+    unittest.main()
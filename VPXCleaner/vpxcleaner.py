@@ -1,10 +1,68 @@
 import olefile
 import struct
 import argparse
+import glob
+import hashlib
+import io
+import json
+import os
+import re
+import sys
+import time
+import zlib
+from array import array
+from contextlib import contextmanager
 from datetime import datetime
+from multiprocessing import Pool
 
-def list_vpx_assets(vpx_path):
-    ole = olefile.OleFileIO(vpx_path)
+import vpxreader
+
+try:
+    import resource  # POSIX only; used to cap worker memory in batch mode
+except ImportError:
+    resource = None
+
+try:
+    from PIL import Image  # optional, only needed for --optimize-images
+except ImportError:
+    Image = None
+
+SCAN_CACHE_VERSION = 1
+ASSET_INDEX_VERSION = 2  # 2: tables keyed by absolute path
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.vpxcleaner_cache')
+
+# Image formats Pillow can decode and Visual Pinball can load
+OPTIMIZABLE_IMAGE_FORMATS = ('png', 'jpg', 'bmp', 'gif', 'webp')
+
+# Compound file readers: olefile, or vpxreader's memory-mapped zero-copy reader
+READER_BACKENDS = ('olefile', 'mmap')
+
+
+def open_vpx(vpx_path, backend='olefile'):
+    """Open a VPX compound file with the given reader backend."""
+    if backend == 'mmap':
+        return vpxreader.CompoundFile(vpx_path)
+    return olefile.OleFileIO(vpx_path)
+
+
+def read_stream(ole, stream, contiguous=False):
+    """Return a stream's data.
+
+    olefile returns a new bytes object. The mmap reader returns a memoryview
+    into the mapped file, or a vpxreader.ChainedView when the stream's sectors
+    are not contiguous (joined into bytes if contiguous=True).
+    """
+    if isinstance(ole, vpxreader.CompoundFile):
+        data = ole.stream_view(stream)
+        if contiguous and isinstance(data, vpxreader.ChainedView):
+            data = data.tobytes()
+        return data
+    with ole.openstream(stream) as s:
+        return s.read()
+
+
+def list_vpx_assets(vpx_path, backend='olefile'):
+    ole = open_vpx(vpx_path, backend)
     streams = ole.listdir()
 
     images = {}  # Store as dict: {name: (stream_path, size)}
@@ -17,38 +75,36 @@ def list_vpx_assets(vpx_path):
         # Extract images and sounds
         if stream_path.startswith("GameStg/Image"):
             try:
-                with ole.openstream(stream) as s:
-                    data = s.read()
-                    # Try to extract the image name from the binary data
-                    # VPX stores names as null-terminated strings in the data
-                    name = extract_name_from_binary(data, is_image=True)
-                    if name:
-                        images[name] = (stream_path, len(data))
+                data = read_stream(ole, stream)
+                # Try to extract the image name from the binary data
+                # VPX stores names as null-terminated strings in the data
+                name = extract_name_from_binary(data, is_image=True)
+                if name:
+                    images[name] = (stream_path, len(data))
             except Exception:
                 pass
                 
         elif stream_path.startswith("GameStg/Sound"):
             try:
-                with ole.openstream(stream) as s:
-                    data = s.read()
-                    # Try to extract the sound name from the binary data
-                    name = extract_name_from_binary(data, is_image=False)
-                    if name:
-                        sounds[name] = (stream_path, len(data))
+                data = read_stream(ole, stream)
+                # Try to extract the sound name from the binary data
+                name = extract_name_from_binary(data, is_image=False)
+                if name:
+                    sounds[name] = (stream_path, len(data))
             except Exception:
                 pass
         
         # Gather all game data for reference searching
         elif stream_path.startswith("GameStg/GameItem") or stream_path == "GameStg/GameData":
             try:
-                with ole.openstream(stream) as s:
-                    data = s.read()
-                    # Decode as text, ignoring errors
-                    text = data.decode('utf-8', errors='ignore')
-                    all_data += text + "\n"
+                data = read_stream(ole, stream, contiguous=True)
+                # Decode as text, ignoring errors
+                text = str(data, 'utf-8', errors='ignore')
+                all_data += text + "\n"
             except Exception:
                 pass
 
+    data = None  # drop the last view so the mmap reader can unmap the file
     ole.close()
     return images, sounds, all_data
 
@@ -74,7 +130,7 @@ def extract_name_from_binary(data, is_image=True):
             return None
             
         field_data = data[4:4+field_len]
-        field_str = field_data.decode('ascii', errors='ignore')
+        field_str = str(field_data, 'ascii', errors='ignore')
         
         if is_image:
             # For images, look for "NAME" at the start, then extract the name after it
@@ -100,6 +156,141 @@ def extract_name_from_binary(data, is_image=True):
         pass
     return None
 
+def wav_file_header(wave_format, data_size):
+    """Build the RIFF/WAVE header for PCM data stored with a WAVEFORMATEX."""
+    fmt = struct.pack('<HHIIHH', *wave_format[:6])
+    return (b'RIFF' + struct.pack('<I', 4 + 8 + len(fmt) + 8 + data_size) + b'WAVE'
+            + b'fmt ' + struct.pack('<I', len(fmt)) + fmt
+            + b'data' + struct.pack('<I', data_size))
+
+
+def _read_exact(f, size):
+    data = f.read(size)
+    if len(data) != size:
+        raise ValueError("truncated asset stream")
+    return data
+
+
+def locate_asset_payload(f, stream_size, is_image=True):
+    """Position a stream at the start of the embedded asset file data.
+
+    Images keep the imported file (PNG, JPG, BMP, ...) in the DATA record of
+    the JPEG block; legacy tables store a VP-internal bitmap in a BITS record.
+    Sounds start with name, path and internal name strings, followed by a
+    WAVEFORMATEX header for WAV files, then the data length and the data.
+
+    Args:
+        f: File-like object positioned at the start of the asset stream
+        stream_size: Total size of the stream in bytes
+        is_image: True for GameStg/Image* streams, False for GameStg/Sound*
+
+    Returns:
+        Dict with 'size' (payload bytes) and the header fields that were found
+        ('width'/'height' for images, 'path' and 'wave_format' for sounds),
+        or None if the stream holds no payload.
+    """
+    info = {}
+    if is_image:
+        while f.tell() + 8 <= stream_size:
+            rec_len, tag = struct.unpack('<I4s', _read_exact(f, 8))
+            if tag == b'DATA':
+                info['size'] = info.get('size', rec_len - 4)
+                return info
+            if tag == b'BITS':
+                # LZW compressed bitmap runs to the end of the texture record
+                info['size'] = stream_size - f.tell()
+                info['format'] = 'bits'
+                return info
+            if tag == b'JPEG':
+                continue  # the embedded file's records follow inline
+            if tag == b'ENDB' or rec_len < 4:
+                return None
+            body = _read_exact(f, rec_len - 4)
+            if tag in (b'WDTH', b'HGHT', b'SIZE') and len(body) == 4:
+                key = {b'WDTH': 'width', b'HGHT': 'height', b'SIZE': 'size'}[tag]
+                info[key] = struct.unpack('<i', body)[0]
+        return None
+
+    strings = []
+    for _ in range(3):  # name, path, internal name
+        length = struct.unpack('<I', _read_exact(f, 4))[0]
+        if length > stream_size - f.tell():
+            raise ValueError("invalid sound header")
+        strings.append(_read_exact(f, length).decode('latin-1'))
+    info['path'] = strings[1]
+    if strings[1].lower().endswith('.wav'):
+        info['wave_format'] = struct.unpack('<HHIIHHH', _read_exact(f, 18))
+    info['size'] = struct.unpack('<I', _read_exact(f, 4))[0]
+    if info['size'] > stream_size - f.tell():
+        raise ValueError("invalid sound data length")
+    return info
+
+
+def detect_asset_format(head, info=None):
+    """Guess the file format of an asset payload from its first bytes."""
+    if info:
+        if info.get('format'):
+            return info['format']
+        if info.get('wave_format'):
+            return 'wav'
+    signatures = [
+        (b'\x89PNG', 'png'), (b'\xff\xd8\xff', 'jpg'), (b'BM', 'bmp'),
+        (b'GIF8', 'gif'), (b'\x76\x2f\x31\x01', 'exr'), (b'#?', 'hdr'),
+        (b'OggS', 'ogg'), (b'ID3', 'mp3'), (b'fLaC', 'flac'),
+    ]
+    for magic, fmt in signatures:
+        if head.startswith(magic):
+            return fmt
+    if head[:4] == b'RIFF':
+        return {b'WEBP': 'webp', b'WAVE': 'wav'}.get(head[8:12], 'riff')
+    if len(head) > 1 and head[0] == 0xFF and head[1] & 0xE0 == 0xE0:
+        return 'mp3'
+    return 'unknown'
+
+
+def hash_asset_stream(f, stream_size, is_image=True, chunk_size=1024 * 1024):
+    """Hash an asset's payload without the name/header around it.
+
+    The payload is read and hashed chunk by chunk, so identical files
+    imported under different names produce the same hash. vpxreader streams
+    are hashed straight from the mapped file without copies.
+
+    Returns:
+        Dict with 'hash' (sha256 hex digest), 'size' and 'format',
+        or None if the stream holds no payload.
+    """
+    info = locate_asset_payload(f, stream_size, is_image)
+    if info is None:
+        return None
+
+    digest = hashlib.sha256()
+    remaining = info['size']
+    head = b''
+    if hasattr(f, 'read_views'):
+        # mmap reader: hash straight from the mapped file, no copies
+        for view in f.read_views(remaining):
+            if not head:
+                head = bytes(view[:16])
+            digest.update(view)
+            remaining -= len(view)
+        if remaining:
+            raise ValueError("truncated asset payload")
+    while remaining > 0:
+        chunk = f.read(min(chunk_size, remaining))
+        if not chunk:
+            raise ValueError("truncated asset payload")
+        if not head:
+            head = chunk[:16]
+        digest.update(chunk)
+        remaining -= len(chunk)
+
+    return {
+        'hash': digest.hexdigest(),
+        'size': info['size'],
+        'format': detect_asset_format(head, info),
+    }
+
+
 def find_unused_assets(images, sounds, all_data):
     """Find assets that are not referenced in any game data."""
     # Convert all data to lowercase for case-insensitive searching
@@ -178,6 +369,1421 @@ def remove_unused_assets(vpx_path, unused_images, unused_sounds):
     return report_path
 
 
+def _cache_file(cache_dir, vpx_path):
+    key = hashlib.sha1(os.path.abspath(vpx_path).encode('utf-8')).hexdigest()
+    return os.path.join(cache_dir, f"{key}.json")
+
+
+def load_scan_cache(cache_dir, vpx_path):
+    """Load the cached scan of a table, or None if there is no usable entry."""
+    try:
+        with open(_cache_file(cache_dir, vpx_path), 'r', encoding='utf-8') as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if entry.get('version') != SCAN_CACHE_VERSION or entry.get('path') != os.path.abspath(vpx_path):
+        return None
+    return entry
+
+
+def save_scan_cache(cache_dir, vpx_path, entry):
+    """Store a table's scan results (written atomically, safe across workers)."""
+    os.makedirs(cache_dir, exist_ok=True)
+    cache_path = _cache_file(cache_dir, vpx_path)
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(entry, f)
+    os.replace(tmp_path, cache_path)
+
+
+def _ole_entry(ole, stream):
+    """Directory entry of an olefile stream."""
+    entry = ole.root
+    for part in stream:
+        entry = entry.kids_dict[part.lower()]
+    return entry
+
+
+def _read_stream_head(ole, stream, size):
+    """Read the first sector of a stream without loading the whole stream."""
+    if isinstance(ole, vpxreader.CompoundFile):
+        return bytes(ole.stream_view(stream, limit=ole.sectorsize))
+    if size < ole.minisectorcutoff:
+        with ole.openstream(stream) as s:
+            return s.read(ole.sectorsize)
+    entry = _ole_entry(ole, stream)
+    ole.fp.seek(ole.sectorsize * (entry.isectStart + 1))
+    return ole.fp.read(min(size, ole.sectorsize))
+
+
+class OleChainReader:
+    """Sequential reader for a regular (non-mini) olefile stream.
+
+    olefile's openstream() reads the whole stream into memory; this follows
+    the stream's FAT chain through ole.fp instead, reading only what is asked
+    for (runs of consecutive sectors in one call).
+    """
+
+    def __init__(self, ole, stream):
+        entry = _ole_entry(ole, stream)
+        self.fp = ole.fp
+        self.fat = ole.fat
+        self.sectorsize = ole.sectorsize
+        self.start = entry.isectStart
+        self.size = entry.size
+        self.seek(0)
+
+    def _next(self, sector):
+        if sector >= len(self.fat):
+            raise ValueError("broken sector chain")
+        return self.fat[sector]
+
+    def seek(self, offset, whence=0):
+        if whence == 1:
+            offset += self.pos
+        elif whence == 2:
+            offset += self.size
+        self.pos = max(0, min(offset, self.size))
+        self.sector = self.start
+        for _ in range(self.pos // self.sectorsize):
+            self.sector = self._next(self.sector)
+        return self.pos
+
+    def tell(self):
+        return self.pos
+
+    def read(self, size=-1):
+        remaining = self.size - self.pos
+        size = remaining if size is None or size < 0 else min(size, remaining)
+        chunks = []
+        while size > 0:
+            offset = self.pos % self.sectorsize
+            last, length = self.sector, self.sectorsize - offset
+            while length < size and self._next(last) == last + 1:
+                last += 1
+                length += self.sectorsize
+            self.fp.seek((self.sector + 1) * self.sectorsize + offset)
+            chunk = self.fp.read(min(length, size))
+            if not chunk:
+                raise ValueError("stream extends past the end of the file")
+            chunks.append(chunk)
+            self.pos += len(chunk)
+            size -= len(chunk)
+            for _ in range((offset + len(chunk)) // self.sectorsize):
+                self.sector = self._next(self.sector)
+        return b''.join(chunks)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _summary_from_json(summary):
+    """Turn the lists JSON made of the (stream_path, size) tuples back into tuples."""
+    for key in ('images', 'sounds', 'unused_images', 'unused_sounds'):
+        summary[key] = {name: tuple(value) for name, value in summary[key].items()}
+    return summary
+
+
+def peak_memory():
+    """Peak resident set size of this process in bytes, or None if unknown."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024  # KB on Linux
+
+
+class ScanStats:
+    """Wall time, bytes read and peak memory for each phase of a scan.
+
+    Peak memory is the process's peak resident set size at the end of the
+    phase (POSIX only). Resident pages of a memory-mapped table count towards
+    it, so with the mmap backend it mostly reflects how much of the table was
+    touched rather than what was allocated; the backend is recorded alongside
+    the phases for that reason. With progress=True, a live status line is
+    shown on stderr while a phase runs, except for phases begun with
+    progress=False (those that print to stdout themselves).
+    """
+
+    def __init__(self, progress=False, backend=None):
+        self.phases = []
+        self.backend = backend
+        self.progress = progress and sys.stderr.isatty()
+        self.bytes_read = 0
+        self._current = None
+        self._show_progress = False
+        self._last_update = 0.0
+
+    def begin(self, name, progress=True):
+        self.bytes_read = 0
+        self._current = (name, time.perf_counter())
+        self._show_progress = self.progress and progress
+        self.update(f"{name}...", force=True)
+
+    def end(self):
+        name, start = self._current
+        self.phases.append({
+            'phase': name,
+            'seconds': time.perf_counter() - start,
+            'bytes_read': self.bytes_read,
+            'peak_memory': peak_memory(),
+        })
+        self._current = None
+        if self._show_progress:
+            self._show_progress = False
+            sys.stderr.write("\r" + " " * 78 + "\r")
+            sys.stderr.flush()
+
+    @contextmanager
+    def phase(self, name, progress=True):
+        self.begin(name, progress)
+        try:
+            yield self
+        finally:
+            self.end()
+
+    def add_read(self, size):
+        self.bytes_read += size
+
+    def update(self, text, force=False):
+        """Refresh the progress line (at most ten times per second)."""
+        now = time.perf_counter()
+        if self._show_progress and (force or now - self._last_update >= 0.1):
+            self._last_update = now
+            sys.stderr.write(f"\r   ⏳ {text[:72]:<72s}")
+            sys.stderr.flush()
+
+    def to_dict(self):
+        peaks = [p['peak_memory'] for p in self.phases if p['peak_memory'] is not None]
+        return {
+            'backend': self.backend,
+            'phases': self.phases,
+            'total_seconds': sum(p['seconds'] for p in self.phases),
+            'bytes_read': sum(p['bytes_read'] for p in self.phases),
+            'peak_memory': max(peaks) if peaks else None,
+        }
+
+
+def _container_size(ole):
+    """Approximate bytes read to open a compound file: header, FAT and directory."""
+    fat = getattr(ole, 'fat', None) or []
+    entries = getattr(ole, 'entries', None) or getattr(ole, 'direntries', None) or []
+    return 512 + len(fat) * 4 + len(entries) * 128
+
+
+def analyze_vpx(vpx_path, cache_dir=None, backend='olefile', stats=None):
+    """Scan a single VPX file and summarize its unused assets.
+
+    Asset names live at the very start of each image/sound stream, so only the
+    first sector of those streams is read; the game item and game data streams
+    are read in full for reference matching.
+
+    With a cache_dir, results are stored per table. A table whose size and
+    mtime are unchanged is answered from the cache without being opened.
+    Otherwise every stream is fingerprinted (size plus CRC32 of the first
+    sector for assets, of the whole stream for game data) and only streams
+    whose fingerprint changed get their names extracted and references
+    matched again.
+
+    backend selects the compound file reader (see open_vpx). Phase timings
+    are recorded in stats (a ScanStats, one is created if not given) and
+    returned under the summary's 'stats' key.
+
+    Returns a plain dict so the result can be sent back from a worker process.
+    """
+    stats = stats or ScanStats()
+    stats.backend = backend
+    stat = os.stat(vpx_path)
+    with stats.phase('cache lookup'):
+        cached = load_scan_cache(cache_dir, vpx_path) if cache_dir else None
+    if cached and cached['size'] == stat.st_size and cached['mtime'] == stat.st_mtime:
+        summary = _summary_from_json(cached['summary'])
+        summary.update(path=vpx_path, cache='hit', reanalyzed=0, stats=stats.to_dict())
+        return summary
+
+    old_streams = cached['streams'] if cached else {}
+    streams = {}
+    texts = {}
+    images = {}
+    sounds = {}
+
+    with stats.phase('open'):
+        ole = open_vpx(vpx_path, backend)
+        stats.add_read(_container_size(ole))
+    try:
+        with stats.phase('directory walk'):
+            listing = [(stream, '/'.join(stream)) for stream in ole.listdir()]
+            asset_streams = [(stream, path) for stream, path in listing
+                             if path.startswith(("GameStg/Image", "GameStg/Sound"))]
+            game_streams = [(stream, path) for stream, path in listing
+                            if path.startswith("GameStg/GameItem") or path == "GameStg/GameData"]
+
+        with stats.phase('asset catalog'):
+            for i, (stream, stream_path) in enumerate(asset_streams, 1):
+                stats.update(f"Asset catalog: {i}/{len(asset_streams)} streams")
+                is_image = stream_path.startswith("GameStg/Image")
+                size = ole.get_size(stream)
+                try:
+                    head = _read_stream_head(ole, stream, size)
+                except Exception:
+                    continue
+                stats.add_read(len(head))
+                entry = {'fingerprint': [size, zlib.crc32(head)]}
+                old = old_streams.get(stream_path)
+                if old and old['fingerprint'] == entry['fingerprint']:
+                    entry['name'] = old['name']
+                else:
+                    entry['name'] = extract_name_from_binary(head, is_image=is_image)
+                streams[stream_path] = entry
+                if entry['name']:
+                    (images if is_image else sounds)[entry['name']] = (stream_path, size)
+
+        with stats.phase('game data collection'):
+            for i, (stream, stream_path) in enumerate(game_streams, 1):
+                stats.update(f"Game data: {i}/{len(game_streams)} streams "
+                             f"({format_size(stats.bytes_read)})")
+                try:
+                    data = read_stream(ole, stream, contiguous=True)
+                except Exception:
+                    continue
+                stats.add_read(len(data))
+                texts[stream_path] = str(data, 'utf-8', errors='ignore').lower()
+                streams[stream_path] = {'fingerprint': [len(data), zlib.crc32(data)]}
+                data = None
+    finally:
+        ole.close()
+
+    # Reference index: which asset names each game data stream mentions.
+    # Unchanged streams only need checking against names they haven't seen.
+    with stats.phase('reference matching'):
+        names = sorted({name.lower() for name in list(images) + list(sounds)})
+        name_set = set(names)
+        old_names = set(cached['names']) if cached else set()
+        new_names = [name for name in names if name not in old_names]
+        referenced = set()
+        reanalyzed = 0
+        for i, (stream_path, text) in enumerate(texts.items(), 1):
+            stats.update(f"Reference matching: {i}/{len(texts)} streams")
+            entry = streams[stream_path]
+            old = old_streams.get(stream_path)
+            if old and old['fingerprint'] == entry['fingerprint']:
+                refs = [name for name in old['refs'] if name in name_set]
+                refs += [name for name in new_names if name in text]
+            else:
+                refs = [name for name in names if name in text]
+                reanalyzed += 1
+            entry['refs'] = refs
+            referenced.update(refs)
+        reanalyzed += sum(1 for path, entry in streams.items() if 'name' in entry
+                          and old_streams.get(path, {}).get('fingerprint') != entry['fingerprint'])
+
+        unused_images = {n: v for n, v in images.items() if n.lower() not in referenced}
+        unused_sounds = {n: v for n, v in sounds.items() if n.lower() not in referenced}
+        unused_image_size = sum(size for _, size in unused_images.values())
+        unused_sound_size = sum(size for _, size in unused_sounds.values())
+
+    summary = {
+        'path': vpx_path,
+        'file_size': stat.st_size,
+        'images': images,
+        'sounds': sounds,
+        'game_data_length': sum(len(text) + 1 for text in texts.values()),
+        'unused_images': unused_images,
+        'unused_sounds': unused_sounds,
+        'unused_image_size': unused_image_size,
+        'unused_sound_size': unused_sound_size,
+        'total_savings': unused_image_size + unused_sound_size,
+    }
+
+    if cache_dir:
+        save_scan_cache(cache_dir, vpx_path, {
+            'version': SCAN_CACHE_VERSION,
+            'path': os.path.abspath(vpx_path),
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+            'names': names,
+            'streams': streams,
+            'summary': summary,
+        })
+
+    summary.update(cache='partial' if cached else 'miss', reanalyzed=reanalyzed, stats=stats.to_dict())
+    return summary
+
+
+def collect_vpx_files(target):
+    """Resolve a file, directory or glob pattern to a sorted list of VPX files."""
+    # Table and folder names often contain brackets, e.g. "Table (Bally 1995) [1.0].vpx",
+    # so real paths win over glob interpretation
+    if os.path.isfile(target):
+        paths = [target]
+    elif os.path.isdir(target):
+        paths = glob.glob(os.path.join(glob.escape(target), '**', '*'), recursive=True)
+        paths = [p for p in paths if p.lower().endswith('.vpx')]
+    else:
+        paths = glob.glob(target, recursive=True)
+    return sorted(p for p in paths if os.path.isfile(p))
+
+
+def _init_batch_worker(max_memory_mb, backend='olefile'):
+    """Apply the per-worker memory limit (POSIX only).
+
+    olefile workers limit their address space (RLIMIT_AS). With the mmap
+    backend the mapped table would count towards that limit, so mmap workers
+    limit their data segment (RLIMIT_DATA) instead, which covers allocations
+    but not read-only file mappings (Linux 4.7+).
+    """
+    if max_memory_mb and resource is not None:
+        kind = resource.RLIMIT_DATA if backend == 'mmap' else resource.RLIMIT_AS
+        limit = max_memory_mb * 1024 * 1024
+        _, hard = resource.getrlimit(kind)
+        if hard != resource.RLIM_INFINITY:
+            limit = min(limit, hard)
+        resource.setrlimit(kind, (limit, hard))
+
+
+def _scan_table(task):
+    """Worker entry point: never raise, report failures in the result instead."""
+    vpx_path, cache_dir, backend = task
+    try:
+        return analyze_vpx(vpx_path, cache_dir, backend)
+    except MemoryError:
+        return {'path': vpx_path, 'error': 'exceeded worker memory limit'}
+    except Exception as e:
+        return {'path': vpx_path, 'error': str(e) or e.__class__.__name__}
+
+
+def scan_library(vpx_paths, jobs=None, max_memory_mb=None, cache_dir=None, backend='olefile',
+                 isolate=False):
+    """Scan many VPX files across a process pool.
+
+    Yields each table's summary (see analyze_vpx) as soon as it finishes, in
+    completion order. Failed tables yield a dict with 'path' and 'error'.
+
+    Args:
+        vpx_paths: List of VPX file paths
+        jobs: Number of worker processes (default: one per CPU)
+        max_memory_mb: Memory limit per worker in MB (POSIX only, see _init_batch_worker)
+        cache_dir: Scan cache directory (see analyze_vpx), None to disable
+        backend: Compound file reader, 'olefile' or 'mmap'
+        isolate: Scan every table in a fresh worker process, so the peak
+            memory in each table's stats belongs to that table alone
+    """
+    # Biggest tables first so a large file doesn't start last and hold up the pool
+    ordered = [(path, cache_dir, backend) for path in sorted(vpx_paths, key=os.path.getsize, reverse=True)]
+    with Pool(processes=jobs, initializer=_init_batch_worker, initargs=(max_memory_mb, backend),
+              maxtasksperchild=1 if isolate else None) as pool:
+        for result in pool.imap_unordered(_scan_table, ordered):
+            yield result
+
+
+def write_library_report(results, report_path):
+    """Write an aggregated report for a batch scan, ranked by potential savings.
+
+    Args:
+        results: List of table summaries returned by scan_library
+        report_path: Path of the text report to create
+
+    Returns:
+        Path to the report file
+    """
+    scanned = sorted((r for r in results if 'error' not in r),
+                     key=lambda r: r['total_savings'], reverse=True)
+    failed = sorted((r for r in results if 'error' in r), key=lambda r: r['path'])
+
+    total_size = sum(r['file_size'] for r in scanned)
+    total_savings = sum(r['total_savings'] for r in scanned)
+
+    with open(report_path, 'w', encoding='utf-8') as f:
+        f.write("="*70 + "\n")
+        f.write("VPX CLEANER - LIBRARY REPORT\n")
+        f.write("="*70 + "\n\n")
+        f.write(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+        f.write(f"Tables scanned: {len(scanned)}\n")
+        f.write(f"Tables failed: {len(failed)}\n")
+        f.write(f"Library size: {format_size(total_size)}\n")
+        f.write(f"Total potential space savings: {format_size(total_savings)}\n\n")
+
+        f.write("TABLES RANKED BY POTENTIAL SAVINGS:\n")
+        f.write("-" * 70 + "\n")
+        for rank, r in enumerate(scanned, 1):
+            percent = (r['total_savings'] / r['file_size'] * 100) if r['file_size'] else 0.0
+            f.write(f"{rank:4d}. {os.path.basename(r['path'])}\n")
+            f.write(f"      Path: {r['path']}\n")
+            f.write(f"      Size: {format_size(r['file_size'])}, "
+                    f"savings: {format_size(r['total_savings'])} ({percent:.1f}%)\n")
+            f.write(f"      Unused images: {len(r['unused_images'])} "
+                    f"({format_size(r['unused_image_size'])}), "
+                    f"unused sounds: {len(r['unused_sounds'])} "
+                    f"({format_size(r['unused_sound_size'])})\n")
+
+        if failed:
+            f.write(f"\n\nFAILED TABLES ({len(failed)}):\n")
+            f.write("-" * 70 + "\n")
+            for r in failed:
+                f.write(f"  - {r['path']}: {r['error']}\n")
+
+    return report_path
+
+
+def run_batch(vpx_paths, args):
+    """Scan a whole library and print/report the aggregated results."""
+    print("="*70)
+    print("VPX CLEANER - Visual Pinball Asset Analyzer (batch mode)")
+    print("="*70)
+    print(f"\n📁 Scanning {len(vpx_paths)} VPX files with {args.jobs or os.cpu_count()} workers...")
+    if args.max_memory:
+        if resource is None:
+            print("   ⚠️  --max-memory is not supported on this platform, ignoring")
+        else:
+            print(f"   Memory limit: {args.max_memory} MB per worker")
+    print()
+
+    results = []
+    width = len(str(len(vpx_paths)))
+    batch_start = time.perf_counter()
+    for result in scan_library(vpx_paths, jobs=args.jobs, max_memory_mb=args.max_memory,
+                               cache_dir=args.cache_dir, backend=args.backend,
+                               isolate=args.stats is not None):
+        results.append(result)
+        name = os.path.basename(result['path'])
+        prefix = f"[{len(results):{width}d}/{len(vpx_paths)}]"
+        if 'error' in result:
+            print(f"{prefix} ❌ {name}: {result['error']}")
+        else:
+            percent = (result['total_savings'] / result['file_size'] * 100) if result['file_size'] else 0.0
+            cached = " (cached)" if result['cache'] == 'hit' else ""
+            print(f"{prefix} {name:40s} {format_size(result['total_savings']):>12s} ({percent:.1f}%){cached}")
+
+    scanned = [r for r in results if 'error' not in r]
+    total_savings = sum(r['total_savings'] for r in scanned)
+    cache_hits = sum(1 for r in scanned if r['cache'] == 'hit')
+
+    print("\n" + "="*70)
+    print(f"💾 Total potential space savings: {format_size(total_savings)}")
+    print(f"   across {len(scanned)} tables ({len(results) - len(scanned)} failed, {cache_hits} unchanged since last scan)")
+    print("="*70)
+
+    if scanned:
+        print("\nTop tables by potential savings:")
+        for r in sorted(scanned, key=lambda r: r['total_savings'], reverse=True)[:10]:
+            print(f"  - {os.path.basename(r['path']):40s} {format_size(r['total_savings']):>12s}")
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    report_start = time.perf_counter()
+    report_path = write_library_report(results, args.report or f"vpx_library_report_{timestamp}.txt")
+    report_seconds = time.perf_counter() - report_start
+    print(f"\n📄 Library report saved to: {report_path}")
+
+    if args.remove:
+        for r in scanned:
+            if r['total_savings'] > 0:
+                remove_unused_assets(r['path'], r['unused_images'], r['unused_sounds'])
+        print("📄 Removal lists written next to each table with unused assets")
+
+    if args.stats == 'text' and scanned:
+        print("\n⏱️  Slowest tables:")
+        for r in sorted(scanned, key=lambda r: r['stats']['total_seconds'], reverse=True)[:10]:
+            slowest = max(r['stats']['phases'], key=lambda p: p['seconds'])
+            peak = r['stats']['peak_memory']
+            print(f"  - {os.path.basename(r['path']):40s} {r['stats']['total_seconds']:8.2f} s"
+                  f"  (mostly {slowest['phase']}, peak {format_size(peak) if peak else 'n/a'})")
+        if args.backend == 'mmap':
+            print("  (mmap backend: peak memory includes the mapped table pages that were read)")
+    elif args.stats == 'json':
+        emit_stats_json({
+            'wall_seconds': time.perf_counter() - batch_start,
+            'report_seconds': report_seconds,
+            'tables': [dict(path=r['path'], file_size=r['file_size'], cache=r['cache'], **r['stats'])
+                       for r in scanned],
+            'failed': [{'path': r['path'], 'error': r['error']} for r in results if 'error' in r],
+        }, args.stats_file)
+
+    if len(scanned) < len(results):
+        exit(1)
+
+
+def index_vpx_assets(vpx_path, backend='olefile'):
+    """Hash every image and sound payload of a VPX file.
+
+    Streams are hashed chunk by chunk from the file (OleChainReader with the
+    olefile backend, the mapped file with mmap), never loaded whole.
+
+    Returns:
+        List of dicts with 'kind', 'name', 'stream', 'size', 'format', 'hash'
+    """
+    assets = []
+    ole = open_vpx(vpx_path, backend)
+    try:
+        for stream in ole.listdir():
+            stream_path = '/'.join(stream)
+            if stream_path.startswith("GameStg/Image"):
+                kind = 'image'
+            elif stream_path.startswith("GameStg/Sound"):
+                kind = 'sound'
+            else:
+                continue
+
+            stream_size = ole.get_size(stream)
+            try:
+                if isinstance(ole, olefile.OleFileIO) and stream_size >= ole.minisectorcutoff:
+                    reader = OleChainReader(ole, stream)
+                else:
+                    reader = ole.openstream(stream)
+                with reader as s:
+                    name = extract_name_from_binary(s.read(512), is_image=(kind == 'image'))
+                    s.seek(0)
+                    entry = hash_asset_stream(s, stream_size, is_image=(kind == 'image'))
+            except Exception:
+                continue
+            if name and entry:
+                entry.update(kind=kind, name=name, stream=stream_path)
+                assets.append(entry)
+    finally:
+        ole.close()
+    return assets
+
+
+def _index_table(task):
+    """Worker entry point for build_asset_index."""
+    vpx_path, backend = task
+    try:
+        stat = os.stat(vpx_path)
+        return vpx_path, {
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+            'assets': index_vpx_assets(vpx_path, backend),
+        }
+    except MemoryError:
+        return vpx_path, {'error': 'exceeded worker memory limit'}
+    except Exception as e:
+        return vpx_path, {'error': str(e) or e.__class__.__name__}
+
+
+def load_asset_index(index_path):
+    """Load a saved asset index, or return an empty one if it is missing or outdated."""
+    if index_path and os.path.exists(index_path):
+        try:
+            with open(index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except ValueError:
+            index = None
+        if isinstance(index, dict) and index.get('version') == ASSET_INDEX_VERSION:
+            return index
+    return {'version': ASSET_INDEX_VERSION, 'tables': {}}
+
+
+def save_asset_index(index, index_path):
+    with open(index_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=1)
+
+
+def build_asset_index(vpx_paths, index=None, jobs=None, max_memory_mb=None, backend='olefile'):
+    """Add the content hashes of every table's assets to a library index.
+
+    Tables are keyed by absolute path. Tables whose size and mtime match the
+    existing index entry are not re-read, and entries of tables that no longer
+    exist are dropped. Tables are hashed in parallel across a process pool.
+
+    Args:
+        vpx_paths: List of VPX file paths
+        index: Existing index (see load_asset_index), updated in place
+        jobs: Number of worker processes (default: one per CPU)
+        max_memory_mb: Memory limit per worker in MB (POSIX only, see _init_batch_worker)
+        backend: Compound file reader, 'olefile' or 'mmap'
+
+    Returns:
+        Tuple of (index, number of tables that were (re)hashed)
+    """
+    if index is None:
+        index = {'version': ASSET_INDEX_VERSION, 'tables': {}}
+    tables = index['tables']
+    for path in [p for p in tables if not os.path.isfile(p)]:
+        del tables[path]
+
+    stale = []
+    for path in map(os.path.abspath, vpx_paths):
+        entry = tables.get(path)
+        stat = os.stat(path)
+        if (entry is None or 'error' in entry or entry['size'] != stat.st_size
+                or entry['mtime'] != stat.st_mtime):
+            stale.append(path)
+
+    if stale:
+        stale.sort(key=os.path.getsize, reverse=True)
+        with Pool(processes=jobs, initializer=_init_batch_worker,
+                  initargs=(max_memory_mb, backend)) as pool:
+            tasks = [(path, backend) for path in stale]
+            for path, entry in pool.imap_unordered(_index_table, tasks):
+                tables[path] = entry
+
+    return index, len(stale)
+
+
+def find_duplicate_assets(index, vpx_paths=None):
+    """Group identical asset payloads in an index.
+
+    Args:
+        index: Asset index (see build_asset_index)
+        vpx_paths: Only consider these tables (default: every indexed table)
+
+    Returns:
+        List of duplicate groups sorted by reclaimable bytes, each a dict with
+        'hash', 'kind', 'format', 'size', 'reclaimable' and 'copies'
+        (list of (table path, asset name, stream path))
+    """
+    groups = {}
+    paths = map(os.path.abspath, vpx_paths) if vpx_paths is not None else index['tables'].keys()
+    for path in paths:
+        for asset in index['tables'].get(path, {}).get('assets', []):
+            key = (asset['kind'], asset['hash'])
+            group = groups.setdefault(key, {
+                'hash': asset['hash'],
+                'kind': asset['kind'],
+                'format': asset['format'],
+                'size': asset['size'],
+                'copies': [],
+            })
+            group['copies'].append((path, asset['name'], asset['stream']))
+
+    duplicates = []
+    for group in groups.values():
+        if len(group['copies']) > 1:
+            group['reclaimable'] = group['size'] * (len(group['copies']) - 1)
+            duplicates.append(group)
+    duplicates.sort(key=lambda g: g['reclaimable'], reverse=True)
+    return duplicates
+
+
+def write_duplicate_report(duplicates, report_path):
+    """Write the duplicate asset report.
+
+    Groups are split into assets shared between tables and assets repeated
+    inside one table under different names.
+
+    Returns:
+        Path to the report file
+    """
+    cross_table = [g for g in duplicates if len({c[0] for c in g['copies']}) > 1]
+    within_table = [g for g in duplicates if len({c[0] for c in g['copies']}) == 1]
+
+    with open(report_path, 'w', encoding='utf-8') as f:
+        f.write("="*70 + "\n")
+        f.write("VPX CLEANER - DUPLICATE ASSET REPORT\n")
+        f.write("="*70 + "\n\n")
+        f.write(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+        f.write(f"Duplicate groups: {len(duplicates)}\n")
+        f.write(f"Reclaimable: {format_size(sum(g['reclaimable'] for g in duplicates))}\n")
+
+        for title, groups in (("SHARED ACROSS TABLES", cross_table),
+                              ("REPEATED WITHIN A TABLE", within_table)):
+            f.write(f"\n\n{title} ({len(groups)} groups, "
+                    f"{format_size(sum(g['reclaimable'] for g in groups))} reclaimable):\n")
+            f.write("-" * 70 + "\n")
+            if not groups:
+                f.write("  (none)\n")
+            for g in groups:
+                f.write(f"\n  {g['kind']} {g['format']} {format_size(g['size'])} x{len(g['copies'])} "
+                        f"sha256:{g['hash'][:16]}  ({format_size(g['reclaimable'])} reclaimable)\n")
+                for path, name, stream in sorted(g['copies']):
+                    f.write(f"    - {name:40s} {os.path.basename(path)} [{stream}]\n")
+
+    return report_path
+
+
+def run_dedupe(vpx_paths, args):
+    """Index the asset hashes of one or more tables and report duplicates."""
+    print("="*70)
+    print("VPX CLEANER - Duplicate Asset Finder")
+    print("="*70)
+
+    vpx_paths = [os.path.abspath(p) for p in vpx_paths]
+    index = load_asset_index(args.index)
+    print(f"\n📁 Hashing assets of {len(vpx_paths)} VPX files...")
+    index, rehashed = build_asset_index(vpx_paths, index, jobs=args.jobs,
+                                        max_memory_mb=args.max_memory, backend=args.backend)
+    print(f"   {rehashed} tables hashed, {len(vpx_paths) - rehashed} unchanged since last index")
+    save_asset_index(index, args.index)
+    print(f"   Index saved to: {args.index}")
+
+    for path in vpx_paths:
+        if 'error' in index['tables'][path]:
+            print(f"   ❌ {path}: {index['tables'][path]['error']}")
+
+    duplicates = find_duplicate_assets(index, vpx_paths)
+    cross_table = [g for g in duplicates if len({c[0] for c in g['copies']}) > 1]
+    within_table = [g for g in duplicates if len({c[0] for c in g['copies']}) == 1]
+
+    print("\n" + "="*70)
+    print(f"🔁 Shared across tables: {len(cross_table)} assets "
+          f"({format_size(sum(g['reclaimable'] for g in cross_table))} reclaimable)")
+    print(f"🔁 Repeated within a table: {len(within_table)} assets "
+          f"({format_size(sum(g['reclaimable'] for g in within_table))} reclaimable)")
+    print("="*70)
+
+    if duplicates:
+        print("\nLargest duplicates:")
+        for g in duplicates[:10]:
+            names = sorted({c[1] for c in g['copies']})
+            print(f"  - {names[0]:40s} x{len(g['copies'])} {format_size(g['reclaimable']):>12s}")
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        report_path = write_duplicate_report(duplicates, args.report or f"vpx_duplicates_{timestamp}.txt")
+        print(f"\n📄 Duplicate report saved to: {report_path}")
+    else:
+        print("\n✅ No duplicate assets found!")
+
+
+def safe_filename(name):
+    """Make an asset name usable as a file name on Windows and POSIX."""
+    name = re.sub(r'[<>:"/\\|?*\x00-\x1f]', '_', name).strip(' .')
+    return name or '_'
+
+
+_worker_ole = None
+
+
+def asset_file_names(ole, prefix):
+    """Read the asset names of a table up front and give each a unique file name.
+
+    Different names can map to the same file name (e.g. "bg:left" and
+    "bg?left"), and workers writing in parallel would overwrite each other,
+    so clashing names get the stream name appended.
+
+    Args:
+        ole: Open compound file
+        prefix: "GameStg/Image" or "GameStg/Sound"
+
+    Returns:
+        List of (size, stream_path, name, base_name) tuples
+    """
+    assets = []
+    taken = set()
+    for stream in ole.listdir():
+        stream_path = '/'.join(stream)
+        if not stream_path.startswith(prefix):
+            continue
+        size = ole.get_size(stream)
+        try:
+            name = extract_name_from_binary(_read_stream_head(ole, stream, size),
+                                            is_image=(prefix == "GameStg/Image"))
+        except Exception:
+            name = None
+        base_name = safe_filename(name or stream[-1])
+        if base_name.lower() in taken:
+            base_name = f"{base_name}_{stream[-1]}"
+        taken.add(base_name.lower())
+        assets.append((size, stream_path, name, base_name))
+    return assets
+
+
+def _init_table_worker(vpx_path, max_memory_mb, backend):
+    """Open the table once per worker process."""
+    global _worker_ole
+    _init_batch_worker(max_memory_mb, backend)
+    _worker_ole = open_vpx(vpx_path, backend)
+
+
+def read_asset_payload(data, is_image=True):
+    """Split an asset stream into (payload bytes, header info), or (None, None)."""
+    f = vpxreader.StreamReader(data)
+    info = locate_asset_payload(f, len(data), is_image)
+    if info is None:
+        return None, None
+    start = f.tell()
+    payload = data[start:start + info['size']]
+    info['format'] = detect_asset_format(bytes(payload[:16]), info)
+    return payload, info
+
+
+def asset_payload_views(data, is_image=True):
+    """Locate an asset's payload without copying it.
+
+    Unlike read_asset_payload, a payload spanning several runs of a
+    vpxreader.ChainedView is not joined into bytes.
+
+    Returns:
+        Tuple of (list of memoryview segments, header info), or (None, None)
+    """
+    if not isinstance(data, vpxreader.ChainedView):
+        data = memoryview(data)
+    f = vpxreader.StreamReader(data)
+    info = locate_asset_payload(f, len(data), is_image)
+    if info is None:
+        return None, None
+    start = f.tell()
+    views = list(f.read_views(info['size']))
+    if sum(len(v) for v in views) != info['size']:
+        raise ValueError("truncated asset payload")
+    info['format'] = detect_asset_format(bytes(data[start:start + 16]), info)
+    return views, info
+
+
+def optimize_image_payload(payload, quality=None, max_resolution=None):
+    """Re-encode an image, optionally capping its resolution.
+
+    Lossless PNG by default. With a quality target, opaque images are saved as
+    JPEG at that quality; images with transparency always stay lossless PNG.
+
+    Returns:
+        Tuple of (encoded bytes, format, width, height)
+    """
+    img = Image.open(io.BytesIO(payload))
+    img.load()
+    if max_resolution and max(img.size) > max_resolution:
+        img.thumbnail((max_resolution, max_resolution), Image.LANCZOS)
+
+    has_alpha = img.mode in ('RGBA', 'LA', 'PA') or 'transparency' in img.info
+    out = io.BytesIO()
+    if quality and not has_alpha:
+        img.convert('RGB').save(out, 'JPEG', quality=quality, optimize=True)
+        fmt = 'jpg'
+    else:
+        if img.mode not in ('1', 'L', 'LA', 'P', 'RGB', 'RGBA'):
+            img = img.convert('RGBA' if has_alpha else 'RGB')
+        img.save(out, 'PNG', optimize=True)
+        fmt = 'png'
+    return out.getvalue(), fmt, img.size[0], img.size[1]
+
+
+def _optimize_image_stream(task):
+    """Worker entry point: optimize one image stream and write the result."""
+    stream_path, base_name, output_dir, quality, max_resolution = task
+    result = {'stream': stream_path}
+    try:
+        data = read_stream(_worker_ole, stream_path)
+        result['name'] = extract_name_from_binary(data, is_image=True)
+        payload, info = read_asset_payload(data, is_image=True)
+        del data
+        if payload is None:
+            result['skipped'] = 'no image data'
+            return result
+
+        result.update(format=info['format'], size=len(payload),
+                      width=info.get('width'), height=info.get('height'))
+        if info['format'] not in OPTIMIZABLE_IMAGE_FORMATS:
+            result['skipped'] = f"unsupported format ({info['format']})"
+            return result
+
+        encoded, fmt, width, height = optimize_image_payload(payload, quality, max_resolution)
+        if len(encoded) >= len(payload):
+            result['skipped'] = 'already optimal'
+            return result
+
+        file_name = f"{base_name}.{fmt}"
+        with open(os.path.join(output_dir, file_name), 'wb') as f:
+            f.write(encoded)
+        result.update(file=file_name, new_format=fmt, new_size=len(encoded),
+                      new_width=width, new_height=height, saved=len(payload) - len(encoded))
+    except MemoryError:
+        result['error'] = 'exceeded worker memory limit'
+    except Exception as e:
+        result['error'] = str(e) or e.__class__.__name__
+    return result
+
+
+def optimize_images(vpx_path, output_dir, quality=None, max_resolution=None,
+                    jobs=None, max_memory_mb=None, backend='olefile'):
+    """Re-encode every image of a table in parallel.
+
+    Optimized images are written to output_dir, named after the asset (see
+    asset_file_names). Images that would not get smaller are left out.
+
+    Args:
+        vpx_path: Path to the VPX file
+        output_dir: Directory for the optimized image files
+        quality: JPEG quality (1-95) for opaque images, None for lossless PNG
+        max_resolution: Cap for the longest image side in pixels
+        jobs: Number of worker processes (default: one per CPU)
+        max_memory_mb: Memory limit per worker in MB (POSIX only, see _init_batch_worker)
+        backend: Compound file reader, 'olefile' or 'mmap'
+
+    Yields:
+        One result dict per image stream as soon as it is processed
+    """
+    ole = open_vpx(vpx_path, backend)
+    try:
+        assets = asset_file_names(ole, "GameStg/Image")
+    finally:
+        ole.close()
+
+    os.makedirs(output_dir, exist_ok=True)
+    # Largest images first so one big texture doesn't finish last
+    tasks = [(path, base_name, output_dir, quality, max_resolution)
+             for _, path, _, base_name in sorted(assets, reverse=True)]
+    with Pool(processes=jobs, initializer=_init_table_worker,
+              initargs=(vpx_path, max_memory_mb, backend)) as pool:
+        for result in pool.imap_unordered(_optimize_image_stream, tasks):
+            yield result
+
+
+def run_image_optimization(vpx_path, args):
+    """Optimize a table's images and write the manifest for a table rewrite."""
+    print("="*70)
+    print("VPX CLEANER - Image Optimizer")
+    print("="*70)
+    print(f"\n📁 Optimizing images of {vpx_path}...")
+    mode = f"JPEG quality {args.quality} (PNG for transparent images)" if args.quality else "lossless PNG"
+    print(f"   Mode: {mode}")
+    if args.max_resolution:
+        print(f"   Max resolution: {args.max_resolution} px")
+    print()
+
+    results = []
+    for result in optimize_images(vpx_path, args.optimize_images, args.quality, args.max_resolution,
+                                  jobs=args.jobs, max_memory_mb=args.max_memory,
+                                  backend=args.backend):
+        results.append(result)
+        name = result.get('name') or result['stream']
+        if 'error' in result:
+            print(f"  ❌ {name}: {result['error']}")
+        elif 'skipped' in result:
+            print(f"  - {name:40s} skipped: {result['skipped']}")
+        else:
+            size_change = f"{format_size(result['size'])} -> {format_size(result['new_size'])}"
+            print(f"  ✓ {name:40s} {size_change:>26s}  (-{format_size(result['saved'])})")
+
+    optimized = [r for r in results if 'saved' in r]
+    total_saved = sum(r['saved'] for r in optimized)
+
+    manifest_path = os.path.join(args.optimize_images, 'image_optimization.json')
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'source': vpx_path,
+            'quality': args.quality,
+            'max_resolution': args.max_resolution,
+            'images': sorted(results, key=lambda r: r['stream']),
+        }, f, indent=1)
+
+    print("\n" + "="*70)
+    print(f"🖼️  Optimized images: {len(optimized)} of {len(results)}")
+    print(f"💾 Total image savings: {format_size(total_saved)}")
+    print("="*70)
+    print(f"\n📄 Optimized images and manifest saved to: {args.optimize_images}")
+    print("   Re-import the images listed in image_optimization.json with")
+    print("   Visual Pinball's Image Manager (Ctrl+I) to apply them.")
+
+
+def _export_asset_stream(task):
+    """Worker entry point: write one image/sound payload to its native file format."""
+    stream_path, kind, base_name, output_dir, previous = task
+    result = {'stream': stream_path, 'kind': kind}
+    try:
+        data = read_stream(_worker_ole, stream_path)
+        segments, info = asset_payload_views(data, is_image=(kind == 'image'))
+        if segments is None:
+            result['skipped'] = 'no asset data'
+            return result
+        result.update(format=info['format'], size=info['size'])
+        if info['format'] == 'bits':
+            result['skipped'] = 'legacy VP bitmap, no native file format'
+            return result
+
+        digest = hashlib.sha256()
+        for segment in segments:
+            digest.update(segment)
+        result['hash'] = digest.hexdigest()
+
+        ext = 'bin' if info['format'] == 'unknown' else info['format']
+        file_name = f"{kind}s/{base_name}.{ext}"
+        file_path = os.path.join(output_dir, file_name)
+        header = wav_file_header(info['wave_format'], info['size']) if info.get('wave_format') else b''
+        result['file'] = file_name
+
+        if (previous and previous.get('hash') == result['hash'] and previous.get('file') == file_name
+                and os.path.exists(file_path) and os.path.getsize(file_path) == len(header) + info['size']):
+            result['skipped'] = 'unchanged since last export'
+            return result
+
+        with open(file_path, 'wb') as f:
+            f.write(header)
+            for segment in segments:
+                f.write(segment)
+        result['written'] = len(header) + info['size']
+    except MemoryError:
+        result['error'] = 'exceeded worker memory limit'
+    except Exception as e:
+        result['error'] = str(e) or e.__class__.__name__
+    return result
+
+
+def export_assets(vpx_path, output_dir, referenced=None, previous=None,
+                  jobs=None, max_memory_mb=None, backend='olefile'):
+    """Extract every image and sound payload of a table in parallel.
+
+    Files go to output_dir/images and output_dir/sounds, named after the
+    asset. WAV sounds get their RIFF header back; everything else is written
+    exactly as it was imported.
+
+    Args:
+        vpx_path: Path to the VPX file
+        output_dir: Export directory
+        referenced: Set of asset names referenced by the table, used to tag results
+        previous: Manifest of an earlier export; files whose hash is unchanged are not rewritten
+        jobs: Number of worker processes (default: one per CPU)
+        max_memory_mb: Memory limit per worker in MB (POSIX only, see _init_batch_worker)
+        backend: Compound file reader, 'olefile' or 'mmap'
+
+    Yields:
+        One result dict per asset stream as soon as it is processed
+    """
+    previous_assets = {a['stream']: a for a in (previous or {}).get('assets', [])}
+
+    # Names are read up front so file names can be made unique
+    ole = open_vpx(vpx_path, backend)
+    try:
+        assets = [(size, stream_path, kind, name, base_name)
+                  for kind, prefix in (('image', "GameStg/Image"), ('sound', "GameStg/Sound"))
+                  for size, stream_path, name, base_name in asset_file_names(ole, prefix)]
+    finally:
+        ole.close()
+
+    for kind in ('image', 'sound'):
+        os.makedirs(os.path.join(output_dir, f"{kind}s"), exist_ok=True)
+
+    names = {stream_path: name for _, stream_path, _, name, _ in assets}
+    tasks = [(stream_path, kind, base_name, output_dir, previous_assets.get(stream_path))
+             for _, stream_path, kind, _, base_name in sorted(assets, reverse=True)]
+    with Pool(processes=jobs, initializer=_init_table_worker,
+              initargs=(vpx_path, max_memory_mb, backend)) as pool:
+        for result in pool.imap_unordered(_export_asset_stream, tasks):
+            result['name'] = names[result['stream']]
+            if referenced is not None and result['name']:
+                result['referenced'] = result['name'].lower() in referenced
+            yield result
+
+
+def run_export(vpx_path, args):
+    """Export a table's images and sounds and write the manifest."""
+    print("="*70)
+    print("VPX CLEANER - Asset Export")
+    print("="*70)
+    print(f"\n📁 Exporting assets of {vpx_path}...")
+    print(f"   Output: {args.export}\n")
+
+    manifest_path = os.path.join(args.export, 'manifest.json')
+    previous = None
+    if args.skip_existing and os.path.exists(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+
+    summary = analyze_vpx(vpx_path, args.cache_dir, args.backend)
+    unused = {name.lower() for name in list(summary['unused_images']) + list(summary['unused_sounds'])}
+    referenced = {name.lower() for name in list(summary['images']) + list(summary['sounds'])} - unused
+
+    results = []
+    for result in export_assets(vpx_path, args.export, referenced, previous, jobs=args.jobs,
+                                max_memory_mb=args.max_memory, backend=args.backend):
+        results.append(result)
+        name = result.get('name') or result['stream']
+        if 'error' in result:
+            print(f"  ❌ {name}: {result['error']}")
+        elif 'skipped' in result:
+            print(f"  - {name:40s} skipped: {result['skipped']}")
+        else:
+            print(f"  ✓ {name:40s} {format_size(result['written']):>12s}  {result['file']}")
+
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'source': vpx_path,
+            'exported': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'assets': sorted(results, key=lambda r: (r['kind'], r.get('name') or '')),
+        }, f, indent=1)
+
+    written = [r for r in results if 'written' in r]
+    unchanged = [r for r in results if r.get('skipped') == 'unchanged since last export']
+    failed = [r for r in results if 'error' in r]
+    print("\n" + "="*70)
+    print(f"📦 Exported: {len(written)} files ({format_size(sum(r['written'] for r in written))})")
+    if args.skip_existing:
+        print(f"   Unchanged since last export: {len(unchanged)}")
+    print(f"   Skipped: {len(results) - len(written) - len(unchanged) - len(failed)}, failed: {len(failed)}")
+    print("="*70)
+    print(f"\n📄 Manifest saved to: {manifest_path}")
+    if failed:
+        exit(1)
+
+
+# MPEG audio Layer III bitrates (kbps) and sample rates (Hz) by version
+MP3_BITRATES = {
+    'mpeg1': [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    'mpeg2': [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+MP3_SAMPLE_RATES = {3: [44100, 48000, 32000], 2: [22050, 24000, 16000], 0: [11025, 12000, 8000]}
+
+
+def _ogg_audio_info(payload):
+    """Sample rate, channels and duration of an Ogg Vorbis/Opus payload."""
+    head = bytes(payload[:512])
+    if len(head) < 28:
+        return {}
+    packet = head[27 + head[26]:]
+    if packet.startswith(b'\x01vorbis') and len(packet) >= 16:
+        channels, rate = struct.unpack_from('<BI', packet, 11)
+        granule_rate = rate
+    elif packet.startswith(b'OpusHead') and len(packet) >= 16:
+        channels = packet[9]
+        rate = struct.unpack_from('<I', packet, 12)[0] or 48000
+        granule_rate = 48000  # Opus granule positions always count 48 kHz samples
+    else:
+        return {}
+    info = {'sample_rate': rate, 'channels': channels}
+    tail = bytes(payload[max(0, len(payload) - 65536):])
+    last_page = tail.rfind(b'OggS')
+    if last_page >= 0 and last_page + 14 <= len(tail) and granule_rate:
+        info['duration'] = struct.unpack_from('<q', tail, last_page + 6)[0] / granule_rate
+    return info
+
+
+def _mp3_audio_info(payload):
+    """Sample rate, channels and (constant bitrate) duration of an MP3 payload."""
+    head = bytes(payload[:65536])
+    offset = 0
+    if head.startswith(b'ID3') and len(head) >= 10:
+        offset = 10 + ((head[6] << 21) | (head[7] << 14) | (head[8] << 7) | head[9])
+    while offset + 4 <= len(head):
+        if head[offset] == 0xFF and head[offset + 1] & 0xE0 == 0xE0:
+            header = struct.unpack_from('>I', head, offset)[0]
+            version = (header >> 19) & 3
+            layer = (header >> 17) & 3
+            bitrate_index = (header >> 12) & 15
+            rate_index = (header >> 10) & 3
+            if version != 1 and layer == 1 and 0 < bitrate_index < 15 and rate_index < 3:
+                bitrate = MP3_BITRATES['mpeg1' if version == 3 else 'mpeg2'][bitrate_index] * 1000
+                return {
+                    'sample_rate': MP3_SAMPLE_RATES[version][rate_index],
+                    'channels': 1 if (header >> 6) & 3 == 3 else 2,
+                    'duration': (len(payload) - offset) * 8 / bitrate,
+                }
+        offset += 1
+    return {}
+
+
+def analyze_sound_payload(payload, info):
+    """Describe a sound payload: format, sample rate, channels, bits, duration.
+
+    WAV sounds are described by the WAVEFORMATEX stored in the sound record;
+    Ogg and MP3 files by their own headers (MP3 duration assumes constant bitrate).
+    """
+    result = {'format': info['format'], 'size': len(payload)}
+    if info.get('wave_format'):
+        tag, channels, rate, avg_bytes, block_align, bits, _ = info['wave_format']
+        result.update(sample_rate=rate, channels=channels, bits=bits, pcm=(tag == 1),
+                      duration=len(payload) / avg_bytes if avg_bytes else None)
+    elif info['format'] == 'ogg':
+        result.update(_ogg_audio_info(payload))
+    elif info['format'] == 'mp3':
+        result.update(_mp3_audio_info(payload))
+    return result
+
+
+def _downsample(samples, rate, new_rate):
+    """Resample one channel by averaging each output sample's source window."""
+    step = rate / new_rate
+    count = int(len(samples) / step)
+    out = array(samples.typecode)
+    for i in range(count):
+        start = int(i * step)
+        window = samples[start:max(int((i + 1) * step), start + 1)]
+        out.append(sum(window) // len(window))
+    return out
+
+
+def convert_pcm(data, channels, bits, rate, sample_rate=None, mono=False):
+    """Downmix and/or downsample 8 or 16 bit PCM data.
+
+    Only reduces: the rate is changed when sample_rate is lower than rate,
+    channels are averaged to mono when mono is set.
+
+    Returns:
+        Tuple of (PCM bytes, channels, rate)
+    """
+    samples = array('h' if bits == 16 else 'B')
+    samples.frombytes(bytes(data[:len(data) - len(data) % samples.itemsize]))
+    if bits == 16 and sys.byteorder == 'big':
+        samples.byteswap()
+
+    tracks = [samples[c::channels] for c in range(channels)]
+    if mono and channels > 1:
+        length = min(len(t) for t in tracks)
+        tracks = [array(samples.typecode, (sum(frame) // channels for frame in zip(*tracks)))[:length]]
+    if sample_rate and sample_rate < rate:
+        tracks = [_downsample(t, rate, sample_rate) for t in tracks]
+        rate = sample_rate
+
+    length = min(len(t) for t in tracks)
+    out = array(samples.typecode, bytes(length * len(tracks) * samples.itemsize))
+    for c, track in enumerate(tracks):
+        out[c::len(tracks)] = track[:length]
+    if bits == 16 and sys.byteorder == 'big':
+        out.byteswap()
+    return out.tobytes(), len(tracks), rate
+
+
+def _process_sound_stream(task):
+    """Worker entry point: analyze one sound and re-encode it if requested."""
+    stream_path, base_name, output_dir, sample_rate, mono = task
+    result = {'stream': stream_path}
+    try:
+        data = read_stream(_worker_ole, stream_path)
+        result['name'] = extract_name_from_binary(data[:512], is_image=False)
+        payload, info = read_asset_payload(data, is_image=False)
+        if payload is None:
+            result['skipped'] = 'no sound data'
+            return result
+        result.update(analyze_sound_payload(payload, info))
+        if output_dir is None or not (sample_rate or mono):
+            return result
+
+        if not result.get('pcm') or result.get('bits') not in (8, 16):
+            result['skipped'] = f"unsupported format ({result['format']}, re-encode it before importing)"
+            return result
+        if not ((sample_rate and sample_rate < result['sample_rate']) or (mono and result['channels'] > 1)):
+            result['skipped'] = 'already optimal'
+            return result
+
+        pcm, channels, rate = convert_pcm(payload, result['channels'], result['bits'],
+                                          result['sample_rate'], sample_rate, mono)
+        block_align = channels * result['bits'] // 8
+        wave_format = (1, channels, rate, rate * block_align, block_align, result['bits'], 0)
+        file_name = f"{base_name}.wav"
+        with open(os.path.join(output_dir, file_name), 'wb') as f:
+            f.write(wav_file_header(wave_format, len(pcm)))
+            f.write(pcm)
+        result.update(file=file_name, new_sample_rate=rate, new_channels=channels,
+                      new_size=len(pcm), wave_format=list(wave_format), saved=len(payload) - len(pcm))
+    except MemoryError:
+        result['error'] = 'exceeded worker memory limit'
+    except Exception as e:
+        result['error'] = str(e) or e.__class__.__name__
+    return result
+
+
+def process_sounds(vpx_path, output_dir=None, sample_rate=None, mono=False,
+                   jobs=None, max_memory_mb=None, backend='olefile'):
+    """Analyze every sound of a table and optionally downsample/downmix it, in parallel.
+
+    Args:
+        vpx_path: Path to the VPX file
+        output_dir: Directory for re-encoded WAV files, None to only analyze
+        sample_rate: Downsample PCM sounds above this rate (Hz)
+        mono: Downmix multi-channel PCM sounds to mono
+        jobs: Number of worker processes (default: one per CPU)
+        max_memory_mb: Memory limit per worker in MB (POSIX only, see _init_batch_worker)
+        backend: Compound file reader, 'olefile' or 'mmap'
+
+    Yields:
+        One result dict per sound stream as soon as it is processed
+    """
+    ole = open_vpx(vpx_path, backend)
+    try:
+        assets = asset_file_names(ole, "GameStg/Sound")
+    finally:
+        ole.close()
+
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    tasks = [(path, base_name, output_dir, sample_rate, mono)
+             for _, path, _, base_name in sorted(assets, reverse=True)]
+    with Pool(processes=jobs, initializer=_init_table_worker,
+              initargs=(vpx_path, max_memory_mb, backend)) as pool:
+        for result in pool.imap_unordered(_process_sound_stream, tasks):
+            yield result
+
+
+def run_sound_processing(vpx_path, args):
+    """Print the per-sound analysis and write re-encoded sounds plus manifest."""
+    output_dir = args.optimize_sounds
+    print("="*70)
+    print("VPX CLEANER - Sound Analyzer" if not output_dir else "VPX CLEANER - Sound Optimizer")
+    print("="*70)
+    print(f"\n📁 Analyzing sounds of {vpx_path}...")
+    if output_dir:
+        changes = []
+        if args.sample_rate:
+            changes.append(f"downsample to {args.sample_rate} Hz")
+        if args.mono:
+            changes.append("downmix to mono")
+        print(f"   Re-encoding: {', '.join(changes) or 'nothing (use --sample-rate/--mono)'}")
+    print()
+
+    results = []
+    for result in process_sounds(vpx_path, output_dir, args.sample_rate, args.mono,
+                                 jobs=args.jobs, max_memory_mb=args.max_memory, backend=args.backend):
+        results.append(result)
+        name = result.get('name') or result['stream']
+        if 'error' in result:
+            print(f"  ❌ {name}: {result['error']}")
+            continue
+        duration = f"{result['duration']:.2f} s" if result.get('duration') is not None else '?'
+        rate = f"{result['sample_rate']} Hz" if result.get('sample_rate') else '?'
+        channels = {1: 'mono', 2: 'stereo'}.get(result.get('channels'), f"{result.get('channels', '?')} ch")
+        line = (f"  - {name:32s} {result.get('format', '?'):>4s} {duration:>9s} {rate:>9s} "
+                f"{channels:>7s} {format_size(result.get('size', 0)):>11s}")
+        if 'saved' in result:
+            line += f"  -> {format_size(result['new_size'])} (-{format_size(result['saved'])})"
+        elif output_dir and 'skipped' in result:
+            line += f"  skipped: {result['skipped']}"
+        print(line)
+
+    analyzed = [r for r in results if 'size' in r]
+    total_duration = sum(r.get('duration') or 0 for r in analyzed)
+    wav_bytes = sum(r['size'] for r in analyzed if r['format'] == 'wav')
+    optimized = [r for r in results if 'saved' in r]
+
+    print("\n" + "="*70)
+    print(f"🔊 Sounds: {len(analyzed)} ({format_size(sum(r['size'] for r in analyzed))}, "
+          f"{total_duration:.1f} s of audio)")
+    print(f"   Uncompressed WAV: {format_size(wav_bytes)}")
+    if output_dir:
+        print(f"💾 Re-encoded sounds: {len(optimized)}, saving {format_size(sum(r['saved'] for r in optimized))}")
+    print("="*70)
+
+    if output_dir:
+        manifest_path = os.path.join(output_dir, 'sound_optimization.json')
+        with open(manifest_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'source': vpx_path,
+                'sample_rate': args.sample_rate,
+                'mono': args.mono,
+                'sounds': sorted(results, key=lambda r: r['stream']),
+            }, f, indent=1)
+        print(f"\n📄 Re-encoded sounds and manifest saved to: {output_dir}")
+        print("   Re-import the sounds listed in sound_optimization.json with")
+        print("   Visual Pinball's Sound Manager (Ctrl+U) to apply them.")
+
+
+def print_phase_stats(stats):
+    """Print a phase table for one table's stats (see ScanStats.to_dict)."""
+    print(f"\n⏱️  Phase timings:")
+    for p in stats['phases']:
+        peak = format_size(p['peak_memory']) if p['peak_memory'] is not None else 'n/a'
+        print(f"  {p['phase']:22s} {p['seconds']:9.3f} s {format_size(p['bytes_read']):>12s} read"
+              f"   peak {peak:>10s}")
+    print(f"  {'total':22s} {stats['total_seconds']:9.3f} s {format_size(stats['bytes_read']):>12s} read")
+    if stats.get('backend') == 'mmap':
+        print("  (mmap backend: peak memory includes the mapped table pages that were read)")
+
+
+def emit_stats_json(document, stats_file=None):
+    """Write the --stats json document to stats_file, or print it.
+
+    Printed documents go to the real stdout: in that mode the rest of the
+    output has been redirected to stderr (see __main__), so stdout can be piped.
+    """
+    if stats_file:
+        with open(stats_file, 'w', encoding='utf-8') as f:
+            json.dump(document, f, indent=1)
+        print(f"\n📄 Stats saved to: {stats_file}")
+    else:
+        sys.__stdout__.write(json.dumps(document, indent=1) + "\n")
+        sys.__stdout__.flush()
+
+
 def format_size(bytes_size):
     """Format bytes to human-readable size."""
     for unit in ['B', 'KB', 'MB', 'GB']:
@@ -188,8 +1794,6 @@ def format_size(bytes_size):
 
 
 if __name__ == "__main__":
-    import os
-    
     # Parse command-line arguments
     parser = argparse.ArgumentParser(
         description='VPX Cleaner - Identify and optionally remove unused images and sounds from Visual Pinball VPX files',
@@ -202,18 +1806,116 @@ Examples:
   # Scan and remove unused assets
   python vpxcleaner.py table.vpx --remove
   python vpxcleaner.py table.vpx -r
+
+  # Scan a whole library (directory or glob) across all cores
+  python vpxcleaner.py "D:\\Visual Pinball\\Tables"
+  python vpxcleaner.py "tables/**/*.vpx" --jobs 8 --max-memory 2048
+
+  # Find identical images/sounds across the library
+  python vpxcleaner.py tables --dedupe --index library_index.json
+
+  # Recompress images, capped at 4096 px, as JPEG quality 90 where possible
+  python vpxcleaner.py table.vpx --optimize-images out --quality 90 --max-resolution 4096
+
+  # Sound durations/formats, then downsample to 22 kHz mono
+  python vpxcleaner.py table.vpx --analyze-sounds
+  python vpxcleaner.py table.vpx --optimize-sounds out --sample-rate 22050 --mono
+
+  # Export every image and sound with a JSON manifest
+  python vpxcleaner.py table.vpx --export assets --skip-existing
+
+  # Time each scan phase across a library and save the numbers
+  python vpxcleaner.py tables --stats json --stats-file stats.json --no-cache
         """
     )
-    parser.add_argument('vpx_file', help='Path to the VPX file to analyze')
+    parser.add_argument('vpx_file', help='Path to the VPX file to analyze, or a directory/glob pattern for batch mode')
     parser.add_argument('-r', '--remove', action='store_true', 
                         help='Remove unused assets and create a cleaned VPX file (creates backup)')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='Batch mode: number of worker processes (default: one per CPU)')
+    parser.add_argument('--max-memory', type=int, default=None, metavar='MB',
+                        help='Batch mode: memory limit per worker in MB (POSIX only)')
+    parser.add_argument('--report', metavar='PATH',
+                        help='Batch/dedupe mode: path of the aggregated library or duplicate report')
+    parser.add_argument('--backend', choices=READER_BACKENDS, default='olefile',
+                        help='Compound file reader: olefile, or mmap for the zero-copy memory-mapped reader (default: olefile)')
+    parser.add_argument('--cache', dest='cache_dir', metavar='DIR', default=DEFAULT_CACHE_DIR,
+                        help=f'Scan result cache directory (default: {DEFAULT_CACHE_DIR})')
+    parser.add_argument('--no-cache', dest='cache_dir', action='store_const', const=None,
+                        help='Always rescan tables, do not read or write the scan cache')
+    parser.add_argument('--analyze-sounds', action='store_true',
+                        help='Report duration, sample rate, channels and size of every sound')
+    parser.add_argument('--optimize-sounds', metavar='DIR',
+                        help='Downsample/downmix PCM sounds into DIR and write a manifest')
+    parser.add_argument('--sample-rate', type=int, metavar='HZ',
+                        help='Sound optimization: downsample sounds above HZ (e.g. 22050)')
+    parser.add_argument('--mono', action='store_true',
+                        help='Sound optimization: downmix stereo sounds to mono')
+    parser.add_argument('--stats', choices=['text', 'json'],
+                        help='Report wall time, bytes read and peak memory per scan phase')
+    parser.add_argument('--stats-file', metavar='PATH',
+                        help='Write the --stats json report to PATH instead of stdout')
+    parser.add_argument('--dedupe', action='store_true',
+                        help='Hash asset payloads and report identical assets across and within tables')
+    parser.add_argument('--index', metavar='PATH', default='vpx_asset_index.json',
+                        help='Dedupe mode: asset index file, reused between runs (default: vpx_asset_index.json)')
+    parser.add_argument('--export', metavar='DIR',
+                        help='Export every image and sound to DIR in its native format, with a JSON manifest')
+    parser.add_argument('--skip-existing', action='store_true',
+                        help='Export mode: don\'t rewrite files already exported with the same hash')
+    parser.add_argument('--optimize-images', metavar='DIR',
+                        help='Re-encode the table\'s images into DIR and write a manifest (requires Pillow)')
+    parser.add_argument('--quality', type=int, choices=range(1, 96), metavar='1-95',
+                        help='Image optimization: JPEG quality for opaque images (default: lossless PNG)')
+    parser.add_argument('--max-resolution', type=int, metavar='PX',
+                        help='Image optimization: downscale images whose longest side exceeds PX')
     
     args = parser.parse_args()
     vpx_file = args.vpx_file
+
+    if args.stats == 'json' and not args.stats_file:
+        # stdout carries only the JSON document, human-readable output goes to stderr
+        sys.stdout = sys.stderr
     
-    if not os.path.exists(vpx_file):
-        print(f"❌ Error: File not found: {vpx_file}")
-        exit(1)
+    if args.dedupe:
+        vpx_paths = collect_vpx_files(vpx_file)
+        if not vpx_paths:
+            print(f"❌ Error: File not found: {vpx_file}")
+            exit(1)
+        run_dedupe(vpx_paths, args)
+        exit(0)
+
+    if args.export:
+        if not os.path.isfile(vpx_file):
+            print(f"❌ Error: --export needs a single VPX file: {vpx_file}")
+            exit(1)
+        run_export(vpx_file, args)
+        exit(0)
+
+    if args.analyze_sounds or args.optimize_sounds:
+        if not os.path.isfile(vpx_file):
+            print(f"❌ Error: sound analysis needs a single VPX file: {vpx_file}")
+            exit(1)
+        run_sound_processing(vpx_file, args)
+        exit(0)
+
+    if args.optimize_images:
+        if Image is None:
+            print("❌ Error: --optimize-images requires Pillow (pip install pillow)")
+            exit(1)
+        if not os.path.isfile(vpx_file):
+            print(f"❌ Error: --optimize-images needs a single VPX file: {vpx_file}")
+            exit(1)
+        run_image_optimization(vpx_file, args)
+        exit(0)
+
+    if not os.path.isfile(vpx_file):
+        vpx_paths = collect_vpx_files(vpx_file)
+        if not vpx_paths:
+            print(f"❌ Error: File not found: {vpx_file}")
+            exit(1)
+        run_batch(vpx_paths, args)
+        exit(0)
     
     print("="*70)
     print("VPX CLEANER - Visual Pinball Asset Analyzer")
@@ -222,11 +1924,17 @@ Examples:
     print(f"   File: {vpx_file}")
     print(f"   Size: {format_size(os.path.getsize(vpx_file))}\n")
     
-    images, sounds, all_data = list_vpx_assets(vpx_file)
+    stats = ScanStats(progress=True)
+    summary = analyze_vpx(vpx_file, args.cache_dir, args.backend, stats)
+    images, sounds = summary['images'], summary['sounds']
     
+    if summary['cache'] == 'hit':
+        print("⚡ Unchanged since last scan, using cached results")
+    elif summary['cache'] == 'partial':
+        print(f"⚡ Table changed since last scan, re-analyzed {summary['reanalyzed']} streams")
     print(f"Found {len(images)} images")
     print(f"Found {len(sounds)} sounds")
-    print(f"Game data length: {len(all_data)} characters")
+    print(f"Game data length: {summary['game_data_length']} characters")
     
     if len(images) > 0:
         print("\nSample image names:")
@@ -242,16 +1950,17 @@ Examples:
         if len(sounds) > 5:
             print(f"  ... and {len(sounds) - 5} more")
     
+    stats.begin('report', progress=False)
     print("\n" + "="*70)
     print("CHECKING FOR UNUSED ASSETS...")
     print("="*70 + "\n")
     
-    unused_images, unused_sounds = find_unused_assets(images, sounds, all_data)
+    unused_images, unused_sounds = summary['unused_images'], summary['unused_sounds']
     
     # Calculate potential space savings
-    unused_image_size = sum(size for _, size in unused_images.values())
-    unused_sound_size = sum(size for _, size in unused_sounds.values())
-    total_savings = unused_image_size + unused_sound_size
+    unused_image_size = summary['unused_image_size']
+    unused_sound_size = summary['unused_sound_size']
+    total_savings = summary['total_savings']
     
     print(f"🖼️  Unused Images: {len(unused_images)} ({format_size(unused_image_size)})")
     if unused_images:
@@ -306,4 +2015,11 @@ Examples:
     else:
         if total_savings > 0:
             print("\n💡 Tip: Use --remove flag to generate a removal report")
-            print(f"   Example: python vpxcleaner.py {vpx_file} --remove")
\ No newline at end of file
+            print(f"   Example: python vpxcleaner.py {vpx_file} --remove")
+    stats.end()
+
+    if args.stats == 'text':
+        print_phase_stats(stats.to_dict())
+    elif args.stats == 'json':
+        emit_stats_json(dict(path=vpx_file, file_size=summary['file_size'], cache=summary['cache'],
+                             **stats.to_dict()), args.stats_file)
\ No newline at end of file
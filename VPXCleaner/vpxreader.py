@@ -0,0 +1,324 @@
+import mmap
+import struct
+import sys
+from array import array
+
+CFB_SIGNATURE = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+MAXREGSECT = 0xFFFFFFFA
+ENDOFCHAIN = 0xFFFFFFFE
+NOSTREAM = 0xFFFFFFFF
+STGTY_STORAGE = 1
+STGTY_STREAM = 2
+STGTY_ROOT = 5
+
+
+class ChainedView:
+    """Read-only view over a stream stored in several non-contiguous runs.
+
+    Slicing returns a memoryview when the range falls inside one run and
+    bytes otherwise; segments() yields the runs as memoryviews without copying.
+    """
+
+    def __init__(self, views):
+        self.views = views
+        self.offsets = []
+        total = 0
+        for view in views:
+            self.offsets.append(total)
+            total += len(view)
+        self.size = total
+
+    def __len__(self):
+        return self.size
+
+    def segments(self, start=0, stop=None):
+        """Yield memoryviews covering [start, stop) without copying."""
+        stop = self.size if stop is None else min(stop, self.size)
+        for offset, view in zip(self.offsets, self.views):
+            end = offset + len(view)
+            if end <= start:
+                continue
+            if offset >= stop:
+                break
+            yield view[max(start - offset, 0):min(stop, end) - offset]
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            if key < 0:
+                key += self.size
+            for offset, view in zip(self.offsets, self.views):
+                if key < offset + len(view):
+                    return view[key - offset]
+            raise IndexError("ChainedView index out of range")
+        start, stop, step = key.indices(self.size)
+        if step != 1:
+            raise ValueError("ChainedView slices must be contiguous")
+        parts = list(self.segments(start, stop))
+        if len(parts) == 1:
+            return parts[0]
+        return b''.join(parts)
+
+    def tobytes(self):
+        return b''.join(self.views)
+
+    def __bytes__(self):
+        return self.tobytes()
+
+
+class StreamReader:
+    """File-like reader over a stream view (read() returns bytes copies)."""
+
+    def __init__(self, view):
+        self.view = view
+        self.pos = 0
+
+    def read(self, size=-1):
+        end = len(self.view) if size is None or size < 0 else min(self.pos + size, len(self.view))
+        data = bytes(self.view[self.pos:end])
+        self.pos = end
+        return data
+
+    def read_views(self, size):
+        """Yield the next size bytes as memoryview segments (zero copy)."""
+        end = min(self.pos + size, len(self.view))
+        if isinstance(self.view, ChainedView):
+            yield from self.view.segments(self.pos, end)
+        elif end > self.pos:
+            yield self.view[self.pos:end]
+        self.pos = end
+
+    def seek(self, offset, whence=0):
+        if whence == 1:
+            offset += self.pos
+        elif whence == 2:
+            offset += len(self.view)
+        self.pos = max(0, min(offset, len(self.view)))
+        return self.pos
+
+    def tell(self):
+        return self.pos
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class CompoundFile:
+    """Memory-mapped OLE compound file reader.
+
+    Provides the part of the olefile.OleFileIO API vpxcleaner uses (listdir,
+    get_size, openstream, close) plus stream_view(), which returns a stream as
+    a memoryview into the mapping (or a ChainedView when its sectors are not
+    contiguous) instead of a freshly allocated bytes object.
+
+    Sector chains are only resolved when a stream is accessed, and only as
+    far as needed.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.fp = open(path, 'rb')
+        try:
+            self.mm = mmap.mmap(self.fp.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self.fp.close()
+            raise ValueError("not an OLE2 structured storage file")
+        self.data = memoryview(self.mm)
+        try:
+            self._load()
+        except Exception:
+            self.close()
+            raise
+
+    def _load(self):
+        header = self.data[:512]
+        if len(header) < 512 or header[:8] != CFB_SIGNATURE:
+            raise ValueError("not an OLE2 structured storage file")
+        (self.major_version, byte_order, sector_shift, mini_shift) = struct.unpack_from('<2xHHHH', header, 24)
+        if byte_order != 0xFFFE or sector_shift not in (9, 12):
+            raise ValueError("unsupported compound file header")
+        self.sectorsize = 1 << sector_shift
+        self.minisectorsize = 1 << mini_shift
+        (fat_count, self.first_dir_sector, _, self.minisectorcutoff, self.first_minifat_sector,
+         minifat_count, first_difat_sector, difat_count) = struct.unpack_from('<8I', header, 44)
+
+        # FAT sector ids: 109 in the header, the rest in the DIFAT chain
+        fat_sectors = list(struct.unpack_from('<109I', header, 76))
+        sector = first_difat_sector
+        for _ in range(difat_count):
+            if sector > MAXREGSECT:
+                break
+            ids = self._sector_words(sector)
+            fat_sectors.extend(ids[:-1])
+            sector = ids[-1]
+        fat_sectors = [s for s in fat_sectors[:fat_count] if s <= MAXREGSECT]
+
+        self.fat = array('I')
+        for sector in fat_sectors:
+            self.fat.frombytes(self._sector(sector))
+        if sys.byteorder == 'big':
+            self.fat.byteswap()
+
+        self.entries = self._load_directory()
+        root = self.entries[0]
+        self.ministream_runs = self._runs(root['start'], root['size'], mini=False) if root['size'] else []
+
+        self.minifat = array('I')
+        if minifat_count and self.first_minifat_sector <= MAXREGSECT:
+            for start, length in self._runs(self.first_minifat_sector, minifat_count * self.sectorsize, mini=False):
+                self.minifat.frombytes(self.data[start:start + length])
+            if sys.byteorder == 'big':
+                self.minifat.byteswap()
+
+        self.streams = {}
+        self._walk(root['child'], ())
+
+    def _sector(self, sector):
+        offset = (sector + 1) * self.sectorsize
+        if sector > MAXREGSECT or offset + self.sectorsize > len(self.data):
+            raise ValueError(f"sector {sector} out of range")
+        return self.data[offset:offset + self.sectorsize]
+
+    def _sector_words(self, sector):
+        return struct.unpack(f'<{self.sectorsize // 4}I', self._sector(sector))
+
+    def _load_directory(self):
+        raw = b''.join(bytes(self.data[start:start + length])
+                       for start, length in self._runs(self.first_dir_sector, None, mini=False))
+        entries = []
+        for offset in range(0, len(raw) - 127, 128):
+            name_len, entry_type, _, left, right, child = struct.unpack_from('<HBB3I', raw, offset + 64)
+            start, size_low, size_high = struct.unpack_from('<3I', raw, offset + 116)
+            size = size_low if self.major_version == 3 else size_low | (size_high << 32)
+            name = raw[offset:offset + max(name_len - 2, 0)].decode('utf-16-le', errors='replace')
+            entries.append({'name': name, 'type': entry_type, 'left': left, 'right': right,
+                            'child': child, 'start': start, 'size': size})
+        if not entries or entries[0]['type'] != STGTY_ROOT:
+            raise ValueError("missing root directory entry")
+        return entries
+
+    def _walk(self, sid, parent):
+        """Collect stream paths from a storage's sibling tree."""
+        stack = [sid]
+        seen = set()
+        while stack:
+            sid = stack.pop()
+            if sid == NOSTREAM or sid >= len(self.entries) or sid in seen:
+                continue
+            seen.add(sid)
+            entry = self.entries[sid]
+            stack += [entry['left'], entry['right']]
+            path = parent + (entry['name'],)
+            if entry['type'] == STGTY_STREAM:
+                self.streams['/'.join(path).lower()] = (path, entry)
+            elif entry['type'] == STGTY_STORAGE:
+                self._walk(entry['child'], path)
+
+    def _runs(self, sector, size, mini, limit=None):
+        """Resolve a sector chain to a list of (file offset, length) runs.
+
+        Consecutive sectors are merged into one run. Stops after `limit`
+        bytes if given, so reading a stream's head doesn't walk the whole chain.
+        """
+        table = self.minifat if mini else self.fat
+        sector_size = self.minisectorsize if mini else self.sectorsize
+        wanted = size if limit is None else min(limit, size if size is not None else limit)
+        runs = []
+        covered = 0
+        steps = 0
+        while sector <= MAXREGSECT and (wanted is None or covered < wanted):
+            steps += 1
+            if sector >= len(table) or steps > len(table):
+                raise ValueError("broken sector chain")
+            if mini:
+                offset = self._ministream_offset(sector * sector_size)
+            else:
+                offset = (sector + 1) * sector_size
+            if runs and runs[-1][0] + runs[-1][1] == offset:
+                runs[-1][1] += sector_size
+            else:
+                runs.append([offset, sector_size])
+            covered += sector_size
+            sector = table[sector]
+        if wanted is not None:
+            if covered < wanted:
+                raise ValueError("sector chain shorter than stream")
+            excess = covered - wanted
+            while excess and runs:
+                cut = min(excess, runs[-1][1])
+                runs[-1][1] -= cut
+                excess -= cut
+                if not runs[-1][1]:
+                    runs.pop()
+        if runs and runs[-1][0] + runs[-1][1] > len(self.data):
+            raise ValueError("stream extends past the end of the file")
+        return [(start, length) for start, length in runs]
+
+    def _ministream_offset(self, position):
+        for start, length in self.ministream_runs:
+            if position < length:
+                return start + position
+            position -= length
+        raise ValueError("mini sector outside the mini stream")
+
+    def _entry(self, stream):
+        key = stream if isinstance(stream, str) else '/'.join(stream)
+        try:
+            return self.streams[key.lower()][1]
+        except KeyError:
+            raise OSError(f"stream not found: {key}") from None
+
+    def listdir(self):
+        return [list(path) for path, _ in sorted(self.streams.values(),
+                                                  key=lambda item: [p.lower() for p in item[0]])]
+
+    def exists(self, stream):
+        key = stream if isinstance(stream, str) else '/'.join(stream)
+        return key.lower() in self.streams
+
+    def get_size(self, stream):
+        return self._entry(stream)['size']
+
+    def stream_view(self, stream, limit=None):
+        """Return a stream (or its first `limit` bytes) without copying.
+
+        Returns:
+            memoryview when the data is contiguous in the file, ChainedView otherwise
+        """
+        entry = self._entry(stream)
+        size = entry['size'] if limit is None else min(limit, entry['size'])
+        if not size:
+            return self.data[0:0]
+        mini = entry['size'] < self.minisectorcutoff
+        runs = self._runs(entry['start'], entry['size'], mini, limit=size)
+        views = [self.data[start:start + length] for start, length in runs]
+        return views[0] if len(views) == 1 else ChainedView(views)
+
+    def openstream(self, stream):
+        return StreamReader(self.stream_view(stream))
+
+    def close(self):
+        if getattr(self, 'data', None) is not None:
+            try:
+                self.data.release()
+            except BufferError:
+                pass
+            self.data = None
+        if getattr(self, 'mm', None) is not None:
+            try:
+                self.mm.close()
+            except BufferError:
+                pass  # a caller still holds a view; the mapping goes away with it
+            self.mm = None
+        self.fp.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()